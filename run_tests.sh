@@ -73,6 +73,13 @@ if [ -n "$SPECIFIC_TEST" ]; then
     PYTEST_CMD="$PYTEST_CMD $SPECIFIC_TEST"
 fi
 
+# Run tests in parallel when pytest-xdist is installed and there is more than
+# one core. Every test gets fresh in-memory caches (see tests/conftest.py), so
+# tests can land on any worker.
+if python3 -c "import os, xdist; exit((os.cpu_count() or 1) < 2)" &> /dev/null; then
+    PYTEST_CMD="$PYTEST_CMD -n auto"
+fi
+
 # Add coverage if requested
 if [ "$COVERAGE" = true ]; then
     echo -e "${YELLOW}Running tests with coverage...${NC}"
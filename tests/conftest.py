@@ -0,0 +1,157 @@
+import pytest
+import sys
+import os
+from collections import OrderedDict
+from unittest.mock import MagicMock
+from cachetools import TTLCache
+
+# Add parent directory to path for imports. Done here so the web.app import
+# below runs once per session, before any test module is collected.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from web.app import app, RECIPE_CACHE_SIZE, RECIPE_CACHE_TTL, LOCAL_RECIPE_CACHE_SIZE, LOCAL_RECIPE_TTL
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Create a test client for the Flask app, shared by the whole session"""
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def in_memory_cache(monkeypatch):
+    """Run every test against fresh in-memory caches, even if Redis is reachable"""
+    monkeypatch.setattr('web.app.USE_REDIS', False)
+    monkeypatch.setattr('web.app.redis_client', None)
+    monkeypatch.setattr('web.app.recipe_cache', TTLCache(maxsize=RECIPE_CACHE_SIZE, ttl=RECIPE_CACHE_TTL))
+    monkeypatch.setattr('web.app.local_recipe_cache', TTLCache(maxsize=LOCAL_RECIPE_CACHE_SIZE, ttl=LOCAL_RECIPE_TTL))
+    monkeypatch.setattr('web.app.rendered_card_cache', OrderedDict())
+    monkeypatch.setattr('web.app.revalidation_cache', OrderedDict())
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """
+    Switch the app to Redis mode against a MagicMock client backed by dicts.
+    Strings live in fake_redis.store and hashes in fake_redis.hashes, as bytes
+    like the real client (decode_responses=False). Pipelined commands run on
+    execute(). Every method is still a mock, so tests can assert on calls or
+    swap in a side_effect to simulate failures.
+    """
+    client = MagicMock()
+    client.store = {}
+    client.hashes = {}
+
+    def as_bytes(value):
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def setex(key, ttl, value):
+        client.store[as_bytes(key)] = as_bytes(value)
+
+    def set_(key, value, nx=False):
+        if nx and as_bytes(key) in client.store:
+            return None
+        client.store[as_bytes(key)] = as_bytes(value)
+        return True
+
+    def hset(name, key, value):
+        client.hashes.setdefault(as_bytes(name), {})[as_bytes(key)] = as_bytes(value)
+
+    def hsetnx(name, key, value):
+        fields = client.hashes.setdefault(as_bytes(name), {})
+        if as_bytes(key) in fields:
+            return 0
+        fields[as_bytes(key)] = as_bytes(value)
+        return 1
+
+    def hdel(name, *keys):
+        fields = client.hashes.get(as_bytes(name), {})
+        return sum(fields.pop(as_bytes(key), None) is not None for key in keys)
+
+    def delete(*keys):
+        return sum(client.store.pop(as_bytes(key), None) is not None for key in keys)
+
+    def scan_iter(match, count=None):
+        # Enough of MATCH for the app's "<escaped prefix>*" patterns
+        prefix = as_bytes(match[:-1].replace('\\', ''))
+        return iter([key for key in client.store if key.startswith(prefix)])
+
+    client.get.side_effect = lambda key: client.store.get(as_bytes(key))
+    client.set.side_effect = set_
+    client.setex.side_effect = setex
+    client.hget.side_effect = lambda name, key: client.hashes.get(as_bytes(name), {}).get(as_bytes(key))
+    client.hset.side_effect = hset
+    client.hdel.side_effect = hdel
+    client.delete.side_effect = delete
+    client.scan_iter.side_effect = scan_iter
+
+    pipe = client.pipeline.return_value
+    queued = []
+    for command in (setex, hset, hsetnx, hdel, delete):
+        getattr(pipe, command.__name__).side_effect = (
+            lambda *args, command=command: queued.append((command, args)))
+
+    def execute():
+        results = [command(*args) for command, args in queued]
+        queued.clear()
+        return results
+    pipe.execute.side_effect = execute
+
+    monkeypatch.setattr('web.app.USE_REDIS', True)
+    monkeypatch.setattr('web.app.redis_client', client)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    """Safety net so no retry loop really sleeps; retry tests pass their own sleeper"""
+    monkeypatch.setattr('web.app.time.sleep', lambda *_: None)
+
+
+# Shared sample data. The fixtures below hand out these dicts without copying,
+# so tests must not mutate them; build a modified copy with dict(...) instead.
+SAMPLE_RECIPE = {
+    '@type': 'Recipe',
+    'name': 'Test Recipe',
+    'description': 'A delicious test recipe',
+    'author': {'name': 'Test Chef'},
+    'image': 'https://example.com/image.jpg',
+    'recipeIngredient': ['1 cup flour', '2 eggs', '1 cup milk'],
+    'recipeInstructions': [
+        {'@type': 'HowToStep', 'text': 'Mix ingredients'},
+        {'@type': 'HowToStep', 'text': 'Bake at 350F'}
+    ],
+    'prepTime': 'PT15M',
+    'cookTime': 'PT30M',
+    'totalTime': 'PT45M',
+    'recipeYield': '4 servings',
+    'aggregateRating': {
+        'ratingValue': 4.5,
+        'reviewCount': 100
+    }
+}
+
+SAMPLE_RECIPE_WITH_IMAGE_OBJECT = {
+    '@type': 'Recipe',
+    'name': 'Test Recipe with Image Object',
+    'image': {
+        '@type': 'ImageObject',
+        'url': 'https://example.com/image.jpg'
+    },
+    'recipeIngredient': ['1 cup flour'],
+    'recipeInstructions': [{'text': 'Mix it up'}]
+}
+
+
+@pytest.fixture(scope="module")
+def sample_recipe():
+    """Sample recipe data for testing"""
+    return SAMPLE_RECIPE
+
+
+@pytest.fixture(scope="module")
+def sample_recipe_with_image_object():
+    """Sample recipe with ImageObject format"""
+    return SAMPLE_RECIPE_WITH_IMAGE_OBJECT
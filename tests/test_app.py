@@ -1,22 +1,29 @@
 import pytest
 import json
-import sys
-import os
+import threading
 from unittest.mock import Mock, patch, MagicMock
-
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from cachetools import TTLCache
 
 from web.app import (
     app,
-    get_recipe_slug,
-    extract_nyt_recipe_id,
     recipe_to_markdown,
     cache_recipe,
     get_cached_recipe,
     get_cache_keys,
+    find_cached_nyt_recipe,
+    backfill_nyt_id_index,
     delete_cached_recipe,
+    get_recipe,
     get_recipe_with_retry,
+    prefetch_recipes,
+    extract_recipe_from_html,
+    http_session,
+    TransientFetchError,
+    PermanentFetchError
+)
+from web.utils import (
+    get_recipe_slug,
+    extract_nyt_recipe_id,
     connect_to_redis_with_retry,
     flatten_instructions,
     normalize_url_for_path,
@@ -27,80 +34,24 @@ from web.app import (
 )
 
 
-@pytest.fixture
-def client():
-    """Create a test client for the Flask app"""
-    app.config['TESTING'] = True
-    with app.test_client() as client:
-        yield client
-
-
-@pytest.fixture
-def sample_recipe():
-    """Sample recipe data for testing"""
-    return {
-        '@type': 'Recipe',
-        'name': 'Test Recipe',
-        'description': 'A delicious test recipe',
-        'author': {'name': 'Test Chef'},
-        'image': 'https://example.com/image.jpg',
-        'recipeIngredient': ['1 cup flour', '2 eggs', '1 cup milk'],
-        'recipeInstructions': [
-            {'@type': 'HowToStep', 'text': 'Mix ingredients'},
-            {'@type': 'HowToStep', 'text': 'Bake at 350F'}
-        ],
-        'prepTime': 'PT15M',
-        'cookTime': 'PT30M',
-        'totalTime': 'PT45M',
-        'recipeYield': '4 servings',
-        'aggregateRating': {
-            'ratingValue': 4.5,
-            'reviewCount': 100
-        }
-    }
-
-
-@pytest.fixture
-def sample_recipe_with_image_object():
-    """Sample recipe with ImageObject format"""
-    return {
-        '@type': 'Recipe',
-        'name': 'Test Recipe with Image Object',
-        'image': {
-            '@type': 'ImageObject',
-            'url': 'https://example.com/image.jpg'
-        },
-        'recipeIngredient': ['1 cup flour'],
-        'recipeInstructions': [{'text': 'Mix it up'}]
-    }
-
-
 class TestURLNormalization:
     """Test URL normalization and denormalization functions"""
 
-    def test_normalize_url_basic(self):
-        """Test basic URL normalization"""
-        url = "https://cooking.nytimes.com/recipes/1234-test"
-        result = normalize_url_for_path(url)
-        assert result == "cooking.nytimes.com/recipes/1234-test"
-
-    def test_normalize_url_http(self):
-        """Test normalization with http protocol"""
-        url = "http://example.com/recipe"
-        result = normalize_url_for_path(url)
-        assert result == "example.com/recipe"
-
-    def test_normalize_url_with_www(self):
-        """Test normalization removes www."""
-        url = "https://www.bonappetit.com/recipe/pasta"
-        result = normalize_url_for_path(url)
-        assert result == "bonappetit.com/recipe/pasta"
-
-    def test_normalize_url_with_www_and_http(self):
-        """Test normalization removes both protocol and www"""
-        url = "http://www.example.com/test"
-        result = normalize_url_for_path(url)
-        assert result == "example.com/test"
+    @pytest.mark.parametrize("url,expected", [
+        ("https://cooking.nytimes.com/recipes/1234-test", "cooking.nytimes.com/recipes/1234-test"),
+        ("http://example.com/recipe", "example.com/recipe"),
+        ("https://www.bonappetit.com/recipe/pasta", "bonappetit.com/recipe/pasta"),
+        ("http://www.example.com/test", "example.com/test"),
+        ("https://www.example.com/recipe?servings=4", "example.com/recipe"),
+        ("HTTPS://WWW.Example.com/Recipe", "example.com/Recipe"),
+        ("https://example.com/recipe/", "example.com/recipe"),
+        ("https://example.com/recipe#comments", "example.com/recipe"),
+        ("example.com/recipe", "example.com/recipe"),
+    ], ids=["basic", "http", "www", "www-and-http", "drops-query",
+            "lowercases-host", "trailing-slash", "drops-fragment", "no-scheme"])
+    def test_normalize_url(self, url, expected):
+        """Test normalization leaves one canonical key per page"""
+        assert normalize_url_for_path(url) == expected
 
     def test_denormalize_path_to_url(self):
         """Test converting path back to URL"""
@@ -108,130 +59,55 @@ class TestURLNormalization:
         result = denormalize_path_to_url(path)
         assert result == "https://cooking.nytimes.com/recipes/1234"
 
-    def test_denormalize_path_to_url_with_www(self):
+    @pytest.mark.parametrize("path,expected", [
+        ("example.com/recipe", "https://www.example.com/recipe"),
+        ("www.example.com/recipe", "https://www.example.com/recipe"),
+    ], ids=["adds-www", "already-has-www"])
+    def test_denormalize_path_to_url_with_www(self, path, expected):
         """Test converting path to URL with www prefix"""
-        path = "example.com/recipe"
-        result = denormalize_path_to_url_with_www(path)
-        assert result == "https://www.example.com/recipe"
-
-    def test_denormalize_path_already_has_www(self):
-        """Test denormalization when path already has www"""
-        path = "www.example.com/recipe"
-        result = denormalize_path_to_url_with_www(path)
-        assert result == "https://www.example.com/recipe"
+        assert denormalize_path_to_url_with_www(path) == expected
 
 
 class TestExtractDomain:
     """Test domain extraction from URLs and paths"""
 
-    def test_extract_from_full_url(self):
-        """Test extracting domain from full URL"""
-        url = "https://cooking.nytimes.com/recipes/1234-test"
-        result = extract_domain(url)
-        assert result == "cooking.nytimes.com"
-
-    def test_extract_from_path(self):
-        """Test extracting domain from path"""
-        path = "bonappetit.com/recipe/pasta-carbonara"
-        result = extract_domain(path)
-        assert result == "bonappetit.com"
-
-    def test_extract_from_path_with_leading_slash(self):
-        """Test domain extraction with leading slash"""
-        path = "/example.com/test/recipe"
-        result = extract_domain(path)
-        assert result == "example.com"
-
-    def test_extract_domain_only(self):
-        """Test extraction when input is just a domain"""
-        domain = "cooking.nytimes.com"
-        result = extract_domain(domain)
-        assert result == "cooking.nytimes.com"
-
-    def test_extract_domain_none(self):
-        """Test extraction with None input"""
-        result = extract_domain(None)
-        assert result is None
-
-    def test_extract_domain_empty(self):
-        """Test extraction with empty string"""
-        result = extract_domain("")
-        assert result is None
+    @pytest.mark.parametrize("path_or_url,expected", [
+        ("https://cooking.nytimes.com/recipes/1234-test", "cooking.nytimes.com"),
+        ("bonappetit.com/recipe/pasta-carbonara", "bonappetit.com"),
+        ("/example.com/test/recipe", "example.com"),
+        ("cooking.nytimes.com", "cooking.nytimes.com"),
+        (None, None),
+        ("", None),
+    ], ids=["full-url", "path", "leading-slash", "domain-only", "none", "empty"])
+    def test_extract_domain(self, path_or_url, expected):
+        """Test extracting the domain from full URLs and clean paths"""
+        assert extract_domain(path_or_url) == expected
 
 
 class TestFormatDuration:
     """Test ISO 8601 duration formatting"""
 
-    def test_format_hours_and_minutes(self):
-        """Test formatting duration with hours and minutes"""
-        duration = "PT2H30M"
-        result = format_duration(duration)
-        assert result == "2 hours 30 minutes"
-
-    def test_format_minutes_only(self):
-        """Test formatting duration with minutes only"""
-        duration = "PT45M"
-        result = format_duration(duration)
-        assert result == "45 minutes"
-
-    def test_format_hours_only(self):
-        """Test formatting duration with hours only"""
-        duration = "PT3H"
-        result = format_duration(duration)
-        assert result == "3 hours"
-
-    def test_format_single_hour(self):
-        """Test singular 'hour' for 1 hour"""
-        duration = "PT1H"
-        result = format_duration(duration)
-        assert result == "1 hour"
-
-    def test_format_single_minute(self):
-        """Test singular 'minute' for 1 minute"""
-        duration = "PT1M"
-        result = format_duration(duration)
-        assert result == "1 minute"
-
-    def test_format_with_seconds(self):
-        """Test formatting with seconds (seconds only shown if no hours)"""
-        duration = "PT30M45S"
-        result = format_duration(duration)
-        assert result == "30 minutes 45 seconds"
-
-    def test_format_seconds_only(self):
-        """Test formatting seconds only"""
-        duration = "PT30S"
-        result = format_duration(duration)
-        assert result == "30 seconds"
-
-    def test_format_hours_no_seconds(self):
-        """Test that seconds are omitted when hours present"""
-        duration = "PT2H30M45S"
-        result = format_duration(duration)
-        assert result == "2 hours 30 minutes"
-
-    def test_format_zero_hours(self):
-        """Test PT0H formats correctly"""
-        duration = "PT0H45M"
-        result = format_duration(duration)
-        assert result == "45 minutes"
-
-    def test_format_already_readable(self):
-        """Test that readable durations pass through"""
-        duration = "45 minutes"
-        result = format_duration(duration)
-        assert result == "45 minutes"
-
-    def test_format_none(self):
-        """Test with None input"""
-        result = format_duration(None)
-        assert result is None
-
-    def test_format_invalid(self):
-        """Test with invalid format"""
-        duration = "INVALID"
-        result = format_duration(duration)
-        assert result == "INVALID"
+    @pytest.mark.parametrize("duration,expected", [
+        ("PT2H30M", "2 hours 30 minutes"),
+        ("PT45M", "45 minutes"),
+        ("PT3H", "3 hours"),
+        ("PT1H", "1 hour"),
+        ("PT1M", "1 minute"),
+        ("PT30M45S", "30 minutes 45 seconds"),
+        ("PT30S", "30 seconds"),
+        # Seconds are only shown when there are no hours
+        ("PT2H30M45S", "2 hours 30 minutes"),
+        ("PT0H45M", "45 minutes"),
+        # Trailing fractional seconds don't hide the minutes
+        ("PT45M0.5S", "45 minutes"),
+        # Readable and unparseable values pass through
+        ("45 minutes", "45 minutes"),
+        (None, None),
+        ("INVALID", "INVALID"),
+    ])
+    def test_format_duration(self, duration, expected):
+        """Test formatting ISO 8601 durations for display"""
+        assert format_duration(duration) == expected
 
 
 class TestRecipeSlug:
@@ -258,6 +134,11 @@ class TestRecipeSlug:
         slug = get_recipe_slug(recipe)
         assert slug == 'super-delicious-cake'
 
+    def test_slug_strips_accents_and_punctuation(self):
+        recipe = {'name': ' Crème Brûlée (Classic) - Quick! '}
+        slug = get_recipe_slug(recipe)
+        assert slug == 'crme-brle-classic---quick'
+
 
 class TestNYTRecipeID:
     """Test NYT recipe ID extraction"""
@@ -272,6 +153,26 @@ class TestNYTRecipeID:
         recipe_id = extract_nyt_recipe_id(url)
         assert recipe_id is None
 
+    def test_extract_nyt_id_without_slug(self):
+        url = 'https://cooking.nytimes.com/recipes/1234567'
+        recipe_id = extract_nyt_recipe_id(url)
+        assert recipe_id == '1234567'
+
+    def test_extract_nyt_id_rejects_overlong_id(self):
+        url = 'https://cooking.nytimes.com/recipes/' + '9' * 50 + '-recipe-name'
+        recipe_id = extract_nyt_recipe_id(url)
+        assert recipe_id is None
+
+    @pytest.mark.parametrize("url,expected", [
+        ("https://cooking.nytimes.com:443/recipes/1234-soup", "1234"),
+        ("https://COOKING.NYTimes.com/recipes/1234-soup", "1234"),
+        ("https://xcooking.nytimes.com/recipes/1234-soup", None),
+        ("https://cooking.nytimes.com.example.com/recipes/1234-soup", None),
+        ("http://[bad/recipes/1234-soup", None),
+    ], ids=["port", "uppercase-host", "lookalike-host", "suffix-host", "malformed"])
+    def test_extract_nyt_id_matches_host_exactly(self, url, expected):
+        assert extract_nyt_recipe_id(url) == expected
+
     def test_extract_nyt_id_guides_no_match(self):
         # Function only matches /recipes/, not /guides/
         url = 'https://cooking.nytimes.com/guides/1234-guide'
@@ -420,6 +321,32 @@ class TestFlattenInstructions:
         result = flatten_instructions(instructions)
         assert result == ['Prepare ingredients', 'Start cooking']
 
+    def test_nested_howtosections(self):
+        """Test sections nested inside sections flatten to their step text"""
+        instructions = [
+            {
+                '@type': 'HowToSection',
+                'itemListElement': [
+                    {'@type': 'HowToStep', 'text': 'Make the dough'},
+                    {
+                        '@type': 'HowToSection',
+                        'itemListElement': [
+                            {'@type': 'HowToStep', 'text': 'Roll it out'},
+                            {'@type': 'HowToStep', 'text': 'Cut into strips'}
+                        ]
+                    }
+                ]
+            },
+            'Serve'
+        ]
+        result = flatten_instructions(instructions)
+        assert result == ['Make the dough', 'Roll it out', 'Cut into strips', 'Serve']
+
+    def test_single_string_instructions(self):
+        """Test a bare string is one step, not one step per character"""
+        result = flatten_instructions("Mix everything and bake.")
+        assert result == ["Mix everything and bake."]
+
 
 class TestMarkdownConversion:
     """Test recipe to markdown conversion"""
@@ -445,8 +372,8 @@ class TestMarkdownConversion:
         assert '4.5/5' in md
 
     def test_markdown_with_tips(self, sample_recipe):
-        sample_recipe['tips'] = ['Tip 1', 'Tip 2']
-        md = recipe_to_markdown(sample_recipe)
+        recipe = dict(sample_recipe, tips=['Tip 1', 'Tip 2'])
+        md = recipe_to_markdown(recipe)
         assert '## Tips' in md
         assert 'Tip 1' in md
 
@@ -538,6 +465,121 @@ class TestCaching:
         # Should not raise an error
         delete_cached_recipe('nonexistent-slug-to-delete')
 
+    def test_delete_several_recipes_in_one_redis_call(self, fake_redis):
+        """Test deleting several slugs issues one DEL, plus one HDEL for their NYT ids"""
+        delete_cached_recipe('1234-soup', '1234-old-soup', 'example.com/stew')
+
+        pipe = fake_redis.pipeline.return_value
+        pipe.delete.assert_called_once_with('recipe:1234-soup', 'recipe:1234-old-soup', 'recipe:example.com/stew')
+        pipe.hdel.assert_called_once_with('nyt_id_index', '1234')
+        pipe.execute.assert_called_once()
+
+    def test_memory_cache_evicts_least_recently_used(self, monkeypatch, sample_recipe):
+        """Test the in-memory cache stays bounded, dropping the coldest recipe"""
+        monkeypatch.setattr('web.app.recipe_cache', TTLCache(maxsize=2, ttl=60))
+
+        cache_recipe('first', sample_recipe, 'https://example.com/1')
+        cache_recipe('second', sample_recipe, 'https://example.com/2')
+        get_cached_recipe('first')  # touch so 'second' becomes the oldest
+        cache_recipe('third', sample_recipe, 'https://example.com/3')
+
+        assert sorted(get_cache_keys()) == ['first', 'third']
+
+    def test_redis_cache_keys(self, fake_redis):
+        """Test Redis keys come back as bytes and are reported as plain slugs"""
+        fake_redis.store.update({b'recipe:example.com/one': b'{}', b'recipe:1234-soup': b'{}'})
+
+        assert get_cache_keys() == ['example.com/one', '1234-soup']
+        fake_redis.keys.assert_not_called()
+
+    def test_redis_cache_keys_prefix_is_matched_literally(self, fake_redis):
+        """Test a key prefix is passed to SCAN MATCH with glob characters escaped"""
+        get_cache_keys('example.com/what?[x]*')
+
+        assert fake_redis.scan_iter.call_args.kwargs['match'] == 'recipe:example.com/what\\?\\[x\\]\\**'
+
+    def test_memory_cache_keys_prefix(self, sample_recipe):
+        """Test the in-memory cache filters keys by prefix"""
+        cache_recipe('1234-soup', sample_recipe, 'https://cooking.nytimes.com/recipes/1234')
+        cache_recipe('5678-stew', sample_recipe, 'https://cooking.nytimes.com/recipes/5678')
+
+        assert get_cache_keys('1234-') == ['1234-soup']
+
+    def test_memory_cache_expires_entries(self, monkeypatch, sample_recipe):
+        """Test the in-memory cache drops recipes once their TTL has passed"""
+        now = [0]
+        monkeypatch.setattr('web.app.recipe_cache', TTLCache(maxsize=2, ttl=60, timer=lambda: now[0]))
+
+        cache_recipe('expiring', sample_recipe, 'https://example.com/expiring')
+        assert get_cached_recipe('expiring') is not None
+
+        now[0] = 61
+        assert get_cached_recipe('expiring') is None
+
+    def test_redis_round_trip(self, fake_redis, monkeypatch, sample_recipe):
+        """Test recipes serialized for Redis decode back to the same data"""
+        cache_recipe('redis-round-trip', sample_recipe, 'https://example.com/recipe')
+        monkeypatch.setattr('web.app.local_recipe_cache', TTLCache(maxsize=1, ttl=60))  # force a Redis read
+
+        cached = get_cached_recipe('redis-round-trip')
+        assert cached['recipe'] == sample_recipe
+        assert cached['original_url'] == 'https://example.com/recipe'
+        assert cached['markdown'].startswith('# Test Recipe')
+        fake_redis.pipeline.return_value.hset.assert_not_called()
+
+    def test_redis_hits_served_from_local_cache(self, fake_redis, sample_recipe):
+        """Test a recipe read from Redis is decoded once, then served in-process until deleted"""
+        fake_redis.store[b'recipe:local-hit'] = json.dumps({'recipe': sample_recipe, 'original_url': 'https://example.com'}).encode()
+
+        assert get_cached_recipe('local-hit')['recipe'] == sample_recipe
+        assert get_cached_recipe('local-hit')['recipe'] == sample_recipe
+        fake_redis.get.assert_called_once_with('recipe:local-hit')
+
+        delete_cached_recipe('local-hit')
+        assert get_cached_recipe('local-hit') is None
+
+    def test_failed_redis_write_is_not_shadowed_locally(self, fake_redis, sample_recipe):
+        """Test a recipe re-cached while Redis is failing isn't hidden by the old local copy"""
+        cache_recipe('shadowed', sample_recipe, 'https://example.com/shadowed')
+
+        fake_redis.pipeline.return_value.execute.side_effect = Exception("Connection refused")
+        cache_recipe('shadowed', dict(sample_recipe, name='Updated Recipe'), 'https://example.com/shadowed')
+
+        assert get_cached_recipe('shadowed')['recipe']['name'] == 'Updated Recipe'
+
+    def test_redis_nyt_id_index(self, fake_redis, sample_recipe):
+        """Test NYT recipes are indexed by id and found without scanning keys"""
+        cache_recipe('1234-soup', sample_recipe, 'https://cooking.nytimes.com/recipes/1234')
+
+        fake_redis.pipeline.return_value.execute.assert_called_once()
+        assert find_cached_nyt_recipe('1234')['recipe'] == sample_recipe
+        assert find_cached_nyt_recipe('5678') is None
+        fake_redis.scan_iter.assert_not_called()
+
+    def test_redis_nyt_id_index_drops_stale_entries(self, fake_redis):
+        """Test an index entry whose recipe has expired is removed and reported as a miss"""
+        fake_redis.hashes[b'nyt_id_index'] = {b'1234': b'1234-expired-name'}
+
+        assert find_cached_nyt_recipe('1234') is None
+
+        assert fake_redis.hashes[b'nyt_id_index'] == {}
+        fake_redis.scan_iter.assert_not_called()
+
+    def test_nyt_id_index_backfilled_once(self, fake_redis):
+        """Test recipes cached before the index existed are indexed by the first backfill only"""
+        fake_redis.store.update({
+            b'recipe:1234-soup': b'{}',
+            b'recipe:5678-stew': b'{}',
+            b'recipe:example.com/bread': b'{}',
+        })
+        fake_redis.hashes[b'nyt_id_index'] = {b'5678': b'5678-newer-stew'}
+
+        backfill_nyt_id_index()
+        backfill_nyt_id_index()
+
+        assert fake_redis.hashes[b'nyt_id_index'] == {b'1234': b'1234-soup', b'5678': b'5678-newer-stew'}
+        fake_redis.scan_iter.assert_called_once()
+
 
 class TestHealthEndpoint:
     """Test health check endpoint"""
@@ -545,7 +587,7 @@ class TestHealthEndpoint:
     def test_health_check(self, client):
         response = client.get('/health')
         assert response.status_code == 200
-        data = json.loads(response.data)
+        data = response.get_json()
         assert data['status'] == 'healthy'
         assert 'timestamp' in data
         assert 'cache_backend' in data
@@ -559,6 +601,13 @@ class TestIndexRoute:
         assert response.status_code == 200
         assert b'Nyetcooking' in response.data
 
+    def test_index_rendered_once(self, client):
+        client.get('/')
+        with patch('web.app.render_template') as mock_render:
+            response = client.get('/')
+        assert response.status_code == 200
+        mock_render.assert_not_called()
+
 
 class TestRecipeProcessing:
     """Test recipe processing endpoint"""
@@ -594,40 +643,390 @@ class TestRetryLogic:
     """Test retry functionality"""
 
     @patch('web.app.get_recipe')
-    @patch('web.app.time.sleep')  # Mock sleep to speed up tests
-    def test_retry_success_on_first_attempt(self, mock_sleep, mock_get_recipe, sample_recipe):
+    def test_retry_success_on_first_attempt(self, mock_get_recipe, sample_recipe):
         mock_get_recipe.return_value = sample_recipe
+        delays = []
 
-        result = get_recipe_with_retry('https://example.com/recipe')
+        result = get_recipe_with_retry('https://example.com/recipe', sleeper=delays.append)
 
         assert result == sample_recipe
         assert mock_get_recipe.call_count == 1
-        assert mock_sleep.call_count == 0
+        assert delays == []
 
     @patch('web.app.get_recipe')
-    @patch('web.app.time.sleep')
-    def test_retry_success_on_second_attempt(self, mock_sleep, mock_get_recipe, sample_recipe):
+    def test_retry_success_on_second_attempt(self, mock_get_recipe, sample_recipe):
         mock_get_recipe.side_effect = [
             ValueError("First attempt failed"),
             sample_recipe
         ]
+        delays = []
 
-        result = get_recipe_with_retry('https://example.com/recipe', max_retries=3)
+        result = get_recipe_with_retry('https://example.com/recipe', max_retries=3,
+                                       sleeper=delays.append, jitter=0)
 
         assert result == sample_recipe
         assert mock_get_recipe.call_count == 2
-        assert mock_sleep.call_count == 1
+        assert delays == [1]
 
     @patch('web.app.get_recipe')
-    @patch('web.app.time.sleep')
-    def test_retry_all_attempts_fail(self, mock_sleep, mock_get_recipe):
+    def test_retry_all_attempts_fail(self, mock_get_recipe):
         mock_get_recipe.side_effect = ValueError("Always fails")
+        delays = []
 
         with pytest.raises(ValueError, match="Always fails"):
-            get_recipe_with_retry('https://example.com/recipe', max_retries=3)
+            get_recipe_with_retry('https://example.com/recipe', max_retries=3,
+                                  sleeper=delays.append, jitter=0)
 
         assert mock_get_recipe.call_count == 3
-        assert mock_sleep.call_count == 2  # Sleep between attempts, not after last
+        assert delays == [1, 2]  # Sleep between attempts, not after last
+
+    @patch('web.app.get_recipe')
+    def test_retry_backoff_is_jittered_and_capped(self, mock_get_recipe):
+        mock_get_recipe.side_effect = ValueError("Always fails")
+        delays = []
+
+        with pytest.raises(ValueError):
+            get_recipe_with_retry('https://example.com/recipe', max_retries=4,
+                                  sleeper=delays.append, max_delay=3)
+
+        assert 1 <= delays[0] <= 1.5
+        assert 2 <= delays[1] <= 3
+        assert delays[2] == 3
+
+    @pytest.mark.parametrize("error", [
+        "HTTP 404: Failed to fetch recipe page",
+        "HTTP 410: Failed to fetch recipe page",
+        "Could not find a Recipe object in any JSON-LD scripts.",
+    ])
+    @patch('web.app.get_recipe')
+    def test_retry_fails_fast_on_permanent_errors(self, mock_get_recipe, error):
+        mock_get_recipe.side_effect = ValueError(error)
+        delays = []
+
+        with pytest.raises(ValueError):
+            get_recipe_with_retry('https://example.com/recipe', max_retries=3, sleeper=delays.append)
+
+        assert mock_get_recipe.call_count == 1
+        assert delays == []
+
+    @pytest.mark.parametrize("error", [
+        "HTTP 429: Failed to fetch recipe page",
+        "HTTP 503: Failed to fetch recipe page",
+        "Request timed out when fetching recipe page",
+    ])
+    @patch('web.app.get_recipe')
+    def test_retry_retries_transient_errors(self, mock_get_recipe, error):
+        mock_get_recipe.side_effect = ValueError(error)
+
+        with pytest.raises(ValueError):
+            get_recipe_with_retry('https://example.com/recipe', max_retries=3, sleeper=lambda _: None)
+
+        assert mock_get_recipe.call_count == 3
+
+    @pytest.mark.parametrize("error,call_count", [
+        (PermanentFetchError("Request error: Invalid URL"), 1),
+        (TransientFetchError("Request error: Chunked encoding error"), 3),
+    ])
+    @patch('web.app.get_recipe')
+    def test_retry_follows_error_class(self, mock_get_recipe, error, call_count):
+        mock_get_recipe.side_effect = error
+
+        with pytest.raises(type(error)):
+            get_recipe_with_retry('https://example.com/recipe', max_retries=3, sleeper=lambda _: None)
+
+        assert mock_get_recipe.call_count == call_count
+
+
+class TestRecipeExtraction:
+    """Test JSON-LD recipe extraction from fetched pages"""
+
+    def _page(self, *scripts):
+        body = ''.join(
+            f'<script type="application/ld+json">{json.dumps(data)}</script>'
+            for data in scripts
+        )
+        return f'<html><head><title>Test</title>{body}</head><body></body></html>'.encode()
+
+    def _response(self, status_code, *chunks, headers=None):
+        """Streamed response whose body arrives as the given chunks"""
+        res = MagicMock(status_code=status_code, headers=headers or {})
+        res.__enter__.return_value = res
+        res.iter_content.return_value = iter(chunks)
+        return res
+
+    def test_extract_single_recipe(self, sample_recipe):
+        result = extract_recipe_from_html(self._page(sample_recipe))
+        assert result['name'] == 'Test Recipe'
+
+    def test_extract_recipe_from_graph(self, sample_recipe):
+        page = self._page({'@graph': [{'@type': 'WebSite', 'name': 'Site'}, sample_recipe]})
+        result = extract_recipe_from_html(page)
+        assert result['name'] == 'Test Recipe'
+
+    def test_extract_recipe_skips_other_scripts(self, sample_recipe):
+        page = self._page({'@type': 'Organization', 'name': 'Org'}, [sample_recipe])
+        result = extract_recipe_from_html(page)
+        assert result['name'] == 'Test Recipe'
+
+    def test_extract_recipe_list_type(self):
+        page = self._page({'@type': ['Recipe', 'NewsArticle'], 'name': 'Listed'})
+        assert extract_recipe_from_html(page)['name'] == 'Listed'
+
+    def test_extract_utf8_without_meta_charset(self):
+        page = '<html><head><script type="application/ld+json">{"@type": "Recipe", "name": "Crème Brûlée"}</script></head></html>'
+        assert extract_recipe_from_html(page.encode('utf-8'))['name'] == 'Crème Brûlée'
+
+    def test_extract_skips_malformed_json(self, sample_recipe):
+        page = self._page(sample_recipe).replace(
+            b'<script', b'<script type="application/ld+json">{not valid json</script><script', 1
+        )
+        assert extract_recipe_from_html(page)['name'] == 'Test Recipe'
+
+    @patch('web.app.parse_html_document')
+    def test_extract_fast_path_skips_dom_parse(self, mock_parse, sample_recipe):
+        result = extract_recipe_from_html(self._page(sample_recipe))
+        assert result['name'] == 'Test Recipe'
+        mock_parse.assert_not_called()
+
+    def test_extract_falls_back_to_dom_parse(self, sample_recipe):
+        # A '>' inside an earlier attribute defeats the byte scan but not lxml
+        page = self._page(sample_recipe).replace(b'<script type=', b'<script data-note="a>b" type=')
+        assert extract_recipe_from_html(page)['name'] == 'Test Recipe'
+
+    @patch('web.app.parse_html_document')
+    def test_extract_no_json_ld(self, mock_parse):
+        with pytest.raises(ValueError, match="Could not find any JSON-LD"):
+            extract_recipe_from_html(b'<html><body>No recipe here</body></html>')
+        mock_parse.assert_not_called()
+
+    def test_extract_no_recipe_object(self):
+        page = self._page({'@type': 'Article', 'name': 'News'})
+        with pytest.raises(ValueError, match="Could not find a Recipe object"):
+            extract_recipe_from_html(page)
+
+    def test_extract_skips_scripts_without_recipe(self, sample_recipe):
+        organization = {'@type': 'Organization', 'name': 'Example Media'}
+        page = self._page(organization, sample_recipe)
+
+        with patch('web.app.json_loads', wraps=json.loads) as mock_loads:
+            result = extract_recipe_from_html(page)
+
+        assert result['name'] == 'Test Recipe'
+        assert mock_loads.call_count == 1
+
+    def test_extract_next_data_tips(self, sample_recipe):
+        next_data = {'props': {'pageProps': {'recipe': {'tips': ['Use cold butter'], 'notes': 'Keeps 3 days'}}}}
+        page = self._page(sample_recipe).replace(
+            b'</head>',
+            f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script></head>'.encode()
+        )
+        result = extract_recipe_from_html(page)
+        assert result['tips'] == ['Use cold butter']
+        assert result['notes'] == 'Keeps 3 days'
+
+    @patch('web.app.http_session')
+    def test_get_recipe_fetches_once(self, mock_session, sample_recipe):
+        mock_session.get.return_value = self._response(200, self._page(sample_recipe))
+
+        result = get_recipe('https://example.com/recipe')
+
+        assert result['name'] == 'Test Recipe'
+        assert mock_session.get.call_count == 1
+
+    @patch('web.app.http_session')
+    def test_get_recipe_reuses_recent_fetch(self, mock_session, sample_recipe):
+        url = 'https://example.com/recent-recipe'
+        mock_session.get.return_value = self._response(200, self._page(sample_recipe))
+
+        first = get_recipe(url)
+        second = get_recipe(url)
+
+        assert second == first
+        assert mock_session.get.call_count == 1
+
+    def test_get_recipe_coalesces_concurrent_fetches(self, monkeypatch, sample_recipe):
+        monkeypatch.setattr('web.app.FETCH_FRESH_SECONDS', 0)
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def slow_fetch(url, validators=None):
+            calls.append(url)
+            started.set()
+            release.wait(5)
+            return self._page(sample_recipe), {}
+        monkeypatch.setattr('web.app.fetch_recipe_page', slow_fetch)
+
+        results = []
+        url = 'https://example.com/popular-recipe'
+        leader = threading.Thread(target=lambda: results.append(get_recipe(url)))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=lambda: results.append(get_recipe(url)))
+        follower.start()
+        follower.join(0.1)  # let it reach the in-flight fetch before releasing
+        release.set()
+        leader.join(5)
+        follower.join(5)
+
+        assert len(calls) == 1
+        assert [r['name'] for r in results] == ['Test Recipe', 'Test Recipe']
+
+    @patch('web.app.get_recipe_with_retry')
+    @patch('web.app.http_session')
+    def test_refresh_bypasses_recent_fetch(self, mock_session, mock_get_recipe_with_retry, client, sample_recipe):
+        url = 'https://example.com/refresh-recent'
+        page = self._page(sample_recipe)
+        mock_session.get.side_effect = lambda *args, **kwargs: self._response(200, page)
+        mock_get_recipe_with_retry.side_effect = lambda u, **kwargs: get_recipe(u)
+        get_recipe(url)
+
+        client.get('/example.com/refresh-recent?refresh=1')
+
+        assert mock_session.get.call_count == 2
+
+    @patch('web.app.http_session')
+    def test_get_recipe_revalidates_with_etag(self, mock_session, sample_recipe, monkeypatch):
+        monkeypatch.setattr('web.app.FETCH_FRESH_SECONDS', 0)
+        url = 'https://example.com/etag-recipe'
+        mock_session.get.side_effect = [
+            self._response(200, self._page(sample_recipe), headers={'ETag': '"abc"'}),
+            self._response(304, headers={'ETag': '"abc"'})
+        ]
+
+        first = get_recipe(url)
+        second = get_recipe(url)
+
+        assert second == first
+        conditional_headers = mock_session.get.call_args_list[1][1]['headers']
+        assert conditional_headers == {'If-None-Match': '"abc"'}
+
+    @pytest.mark.parametrize("status,error_class", [
+        (404, PermanentFetchError),
+        (429, TransientFetchError),
+        (503, TransientFetchError),
+    ])
+    @patch('web.app.http_session')
+    def test_get_recipe_http_error(self, mock_session, status, error_class):
+        mock_session.get.return_value = self._response(status)
+
+        with pytest.raises(error_class, match=f"HTTP {status}"):
+            get_recipe('https://example.com/missing')
+
+    @patch('web.app.http_session')
+    def test_get_recipe_stops_reading_after_recipe(self, mock_session, sample_recipe):
+        page = self._page(sample_recipe)
+        split = page.index(b'</head>')
+        chunks = [page[:split], page[split:], b'<p>comments</p>' * 1000]
+        body = iter(chunks)
+        mock_session.get.return_value = self._response(200)
+        mock_session.get.return_value.iter_content.return_value = body
+
+        result = get_recipe('https://example.com/streamed-recipe')
+
+        assert result['name'] == 'Test Recipe'
+        assert next(body, None) is not None  # the tail was never requested
+
+    @patch('web.app.http_session')
+    def test_get_recipe_waits_for_next_data(self, mock_session, sample_recipe):
+        next_data = {'props': {'pageProps': {'recipe': {'tips': ['Use cold butter']}}}}
+        head = self._page(sample_recipe).replace(b'</head>', b'<script src="/_next/static/app.js"></script></head>')
+        tail = f'<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data)}</script>'.encode()
+        mock_session.get.return_value = self._response(200, head, tail)
+
+        result = get_recipe('https://example.com/next-recipe')
+
+        assert result['tips'] == ['Use cold butter']
+
+    def test_http_session_pools_and_retries(self):
+        """Test the shared session pools connections and only retries failed connects"""
+        adapter = http_session.get_adapter('https://cooking.nytimes.com/')
+        assert adapter._pool_maxsize == 32
+        assert adapter.max_retries.connect == 2
+        assert adapter.max_retries.read == 0
+        assert not adapter.max_retries.status_forcelist
+
+
+class TestPrefetch:
+    """Test concurrent bulk recipe fetching"""
+
+    @patch('web.app.get_recipe_with_retry')
+    def test_prefetch_caches_each_url(self, mock_get_recipe, sample_recipe):
+        mock_get_recipe.return_value = sample_recipe
+        urls = ['https://example.com/prefetch-one', 'https://www.example.com/prefetch-two']
+
+        result = prefetch_recipes(urls)
+
+        assert result == {
+            'https://example.com/prefetch-one': 'example.com/prefetch-one',
+            'https://www.example.com/prefetch-two': 'example.com/prefetch-two'
+        }
+        assert get_cached_recipe('example.com/prefetch-two')['original_url'] == urls[1]
+
+    @patch('web.app.get_recipe_with_retry')
+    def test_prefetch_reports_failures(self, mock_get_recipe, sample_recipe):
+        def fake_fetch(url, **kwargs):
+            if 'bad' in url:
+                raise ValueError("HTTP 404: Failed to fetch recipe page")
+            return sample_recipe
+        mock_get_recipe.side_effect = fake_fetch
+
+        result = prefetch_recipes(['https://example.com/good-prefetch', 'https://example.com/bad-prefetch'])
+
+        assert result['https://example.com/good-prefetch'] == 'example.com/good-prefetch'
+        assert result['https://example.com/bad-prefetch'] is None
+
+    @patch('web.app.get_recipe_with_retry')
+    def test_prefetch_skips_cached_and_duplicates(self, mock_get_recipe, sample_recipe):
+        cache_recipe('example.com/already-cached', sample_recipe, 'https://example.com/already-cached')
+        mock_get_recipe.return_value = sample_recipe
+
+        prefetch_recipes(['https://example.com/already-cached'] * 3)
+
+        mock_get_recipe.assert_not_called()
+
+    @patch('web.app.get_recipe_with_retry')
+    def test_prefetch_endpoint(self, mock_get_recipe, client, sample_recipe):
+        def fake_fetch(url, **kwargs):
+            if 'bad' in url:
+                raise ValueError("HTTP 404: Failed to fetch recipe page")
+            return sample_recipe
+        mock_get_recipe.side_effect = fake_fetch
+
+        response = client.post('/prefetch', data={
+            'urls': ['https://example.com/endpoint-one', 'https://example.com/bad-endpoint']
+        })
+
+        assert response.status_code == 200
+        assert response.get_json()['recipes'] == {
+            'https://example.com/endpoint-one': '/example.com/endpoint-one',
+            'https://example.com/bad-endpoint': None
+        }
+        assert get_cached_recipe('example.com/endpoint-one')
+
+    @patch('web.app.get_recipe_with_retry')
+    def test_prefetch_endpoint_survives_malformed_url(self, mock_get_recipe, client, sample_recipe):
+        mock_get_recipe.return_value = sample_recipe
+
+        response = client.post('/prefetch', data={
+            'urls': ['http://[bad/x', 'https://example.com/after-bad-url']
+        })
+
+        assert response.status_code == 200
+        assert response.get_json()['recipes'] == {
+            'http://[bad/x': None,
+            'https://example.com/after-bad-url': '/example.com/after-bad-url'
+        }
+
+    @pytest.mark.parametrize("urls", [[], ["https://example.com/r"] * 21], ids=["empty", "too-many"])
+    def test_prefetch_endpoint_rejects_bad_batches(self, client, urls):
+        response = client.post('/prefetch', data={'urls': urls})
+        assert response.status_code == 400
+
+    @patch('web.app.prefetch_recipes')
+    def test_prefetch_endpoint_is_post_only(self, mock_prefetch, client):
+        response = client.get('/prefetch?urls=https://example.com/r')
+        assert response.status_code == 405
+        mock_prefetch.assert_not_called()
 
 
 class TestImageFormats:
@@ -680,11 +1079,20 @@ class TestMarkdownExport:
         assert response.content_type == 'text/plain; charset=utf-8'
         assert b'# Test Recipe' in response.data
 
+    def test_markdown_export_uses_cached_markdown(self, client, sample_recipe):
+        """Markdown is rendered once at cache time, not per request"""
+        cache_recipe('example.com/recipe', sample_recipe, 'https://example.com/recipe')
+
+        with patch('web.app.recipe_to_markdown') as mock_to_markdown:
+            response = client.get('/example.com/recipe/markdown')
+
+        assert response.status_code == 200
+        assert b'# Test Recipe' in response.data
+        mock_to_markdown.assert_not_called()
+
     @patch('web.app.get_recipe_with_retry')
     def test_markdown_export_not_cached(self, mock_get_recipe, client, sample_recipe):
         """Test markdown export fetches recipe if not cached"""
-        from web.app import recipe_cache
-        recipe_cache.clear()  # Clear in-memory cache
 
         mock_get_recipe.return_value = sample_recipe
 
@@ -698,6 +1106,88 @@ class TestMarkdownExport:
 class TestPathBasedRouting:
     """Test new path-based URL routing"""
 
+    @patch('web.app.get_recipe_with_retry')
+    def test_nyt_refresh_drops_every_slug_variant(self, mock_get_recipe, client, sample_recipe):
+        """Test ?refresh=1 on a NYT id clears all cached slugs and refetches"""
+        cache_recipe('1234-test-recipe', sample_recipe, 'https://cooking.nytimes.com/recipes/1234')
+        cache_recipe('1234-old-name', sample_recipe, 'https://cooking.nytimes.com/recipes/1234')
+        mock_get_recipe.return_value = sample_recipe
+
+        response = client.get('/1234?refresh=1')
+
+        assert response.status_code == 302
+        mock_get_recipe.assert_called_once()
+        assert get_cached_recipe('1234-old-name') is None
+
+    @patch('web.app.get_recipe_with_retry')
+    def test_uncached_path_tries_bare_domain_alone_first(self, mock_get_recipe, client, sample_recipe):
+        """Test the www. variant isn't fetched when the bare domain answers"""
+        mock_get_recipe.return_value = sample_recipe
+
+        response = client.get('/example.com/bare-first')
+
+        assert response.status_code == 200
+        mock_get_recipe.assert_called_once_with('https://example.com/bare-first', max_retries=2)
+
+    @patch('web.app.get_recipe_with_retry')
+    def test_uncached_path_falls_back_to_www(self, mock_get_recipe, client, sample_recipe):
+        """Test a failed bare-domain fetch moves on to the www. variant"""
+        def fake_fetch(url, **kwargs):
+            if url.startswith('https://www.'):
+                return sample_recipe
+            raise ValueError("Connection error when fetching recipe page")
+        mock_get_recipe.side_effect = fake_fetch
+
+        response = client.get('/example.com/www-fallback')
+
+        assert response.status_code == 200
+        assert get_cached_recipe('example.com/www-fallback')['original_url'] == 'https://www.example.com/www-fallback'
+
+    @patch('web.app.get_recipe_with_retry')
+    def test_stalled_bare_domain_is_not_waited_for(self, mock_get_recipe, client, sample_recipe, monkeypatch):
+        """Test a www. answer is used as soon as it arrives while the bare domain hangs"""
+        monkeypatch.setattr('web.app.VARIANT_HEDGE_SECONDS', 0.01)
+        release = threading.Event()
+
+        def fake_fetch(url, **kwargs):
+            if url.startswith('https://www.'):
+                return sample_recipe
+            release.wait(5)
+            raise ValueError("Request timed out when fetching recipe page")
+        mock_get_recipe.side_effect = fake_fetch
+
+        try:
+            response = client.get('/example.com/stalled')
+            assert not release.is_set()  # returned while the bare fetch was still hanging
+        finally:
+            release.set()
+
+        assert response.status_code == 200
+        assert get_cached_recipe('example.com/stalled')['original_url'] == 'https://www.example.com/stalled'
+
+    @patch('web.app.get_recipe_with_retry')
+    def test_slow_bare_domain_that_answers_first_wins(self, mock_get_recipe, client, sample_recipe, monkeypatch):
+        """Test a hedged bare domain is still used when it answers before the www. variant"""
+        monkeypatch.setattr('web.app.VARIANT_HEDGE_SECONDS', 0.01)
+        www_started = threading.Event()
+        bare_done = threading.Event()
+
+        def fake_fetch(url, **kwargs):
+            if url.startswith('https://www.'):
+                www_started.set()
+                bare_done.wait(5)
+                return dict(sample_recipe, name='From www')
+            www_started.wait(5)
+            bare_done.set()
+            return sample_recipe
+        mock_get_recipe.side_effect = fake_fetch
+
+        response = client.get('/example.com/hedged')
+
+        assert response.status_code == 200
+        assert mock_get_recipe.call_count == 2
+        assert get_cached_recipe('example.com/hedged')['original_url'] == 'https://example.com/hedged'
+
     @patch('web.app.get_recipe_with_retry')
     def test_path_based_url_cached(self, mock_get_recipe, client, sample_recipe):
         """Test accessing recipe by path when cached"""
@@ -714,8 +1204,6 @@ class TestPathBasedRouting:
     @patch('web.app.get_recipe_with_retry')
     def test_path_based_url_not_cached(self, mock_get_recipe, client, sample_recipe):
         """Test accessing recipe by path when not cached - should auto-fetch"""
-        from web.app import recipe_cache
-        recipe_cache.clear()  # Clear in-memory cache
 
         mock_get_recipe.return_value = sample_recipe
 
@@ -738,6 +1226,71 @@ class TestPathBasedRouting:
 
         assert response.status_code == 404
 
+    def test_rendered_card_is_reused(self, client, sample_recipe):
+        """Test a second visit serves the pre-rendered card without re-rendering"""
+        cache_recipe('prerender.example.com/recipe', sample_recipe, 'https://prerender.example.com/recipe')
+
+        first = client.get('/prerender.example.com/recipe')
+        with patch('web.app.render_template') as mock_render:
+            second = client.get('/prerender.example.com/recipe')
+
+        assert second.status_code == 200
+        assert second.data == first.data
+        mock_render.assert_not_called()
+
+    def test_recipe_card_revalidates_with_etag(self, client, sample_recipe):
+        """Test recipe cards carry cache headers and answer 304 to a matching ETag"""
+        cache_recipe('etag.example.com/recipe', sample_recipe, 'https://etag.example.com/recipe')
+
+        first = client.get('/etag.example.com/recipe')
+        assert first.headers['Cache-Control'] == 'public, no-cache'
+        assert first.headers['ETag']
+
+        second = client.get('/etag.example.com/recipe', headers={'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 304
+        assert second.data == b''
+
+    @patch('web.app.get_recipe_with_retry')
+    def test_refresh_response_is_not_stored(self, mock_get_recipe, client, sample_recipe):
+        """Test ?refresh=1 answers with no-store and never with a 304"""
+        cache_recipe('nostore.example.com/recipe', sample_recipe, 'https://nostore.example.com/recipe')
+        etag = client.get('/nostore.example.com/recipe').headers['ETag']
+        mock_get_recipe.return_value = sample_recipe
+
+        for path in ('/nostore.example.com/recipe?refresh=1', '/nostore.example.com/recipe/markdown?refresh=1'):
+            response = client.get(path, headers={'If-None-Match': etag})
+            assert response.status_code == 200
+            assert response.headers['Cache-Control'] == 'no-store'
+            assert 'ETag' not in response.headers
+
+    @patch('web.app.get_recipe_with_retry')
+    def test_refresh_discards_rendered_card(self, mock_get_recipe, client, sample_recipe):
+        """Test ?refresh=1 re-renders from freshly fetched data"""
+        cache_recipe('refresh.example.com/recipe', sample_recipe, 'https://refresh.example.com/recipe')
+        client.get('/refresh.example.com/recipe')
+
+        updated = dict(sample_recipe, name='Updated Recipe')
+        mock_get_recipe.return_value = updated
+
+        response = client.get('/refresh.example.com/recipe?refresh=1')
+        assert b'Updated Recipe' in response.data
+
+        response = client.get('/refresh.example.com/recipe')
+        assert b'Updated Recipe' in response.data
+
+    @patch('web.app.get_recipe_with_retry')
+    def test_nyt_refresh_discards_rendered_card(self, mock_get_recipe, client, sample_recipe):
+        """Test ?refresh=1 on a NYT id re-renders the slug it redirects to"""
+        cache_recipe('4321-test-recipe', sample_recipe, 'https://cooking.nytimes.com/recipes/4321')
+        client.get('/4321-test-recipe')
+
+        mock_get_recipe.return_value = dict(sample_recipe, description='Freshly fetched')
+        response = client.get('/recipes/4321?refresh=1')
+        assert response.location == '/4321-test-recipe'
+
+        response = client.get('/4321-test-recipe')
+        assert b'Freshly fetched' in response.data
+
 
 class TestProcessEndpoint:
     """Test recipe processing with new URL format"""
@@ -755,72 +1308,93 @@ class TestProcessEndpoint:
         # Should redirect to clean path (no https://, no www.)
         assert response.location == '/babi.sh/recipes/test-recipe'
 
+    @patch('web.app.get_recipe_with_retry')
+    def test_process_with_query_round_trips_to_cached_card(self, mock_get_recipe, client, sample_recipe):
+        """Test a URL with a query redirects to a path the card is served from cache"""
+        mock_get_recipe.return_value = sample_recipe
+
+        response = client.post('/process', data={'recipe_url': 'https://example.com/r?id=7'})
+        assert response.location == '/example.com/r'
 
+        response = client.get(response.location)
+        assert response.status_code == 200
+        mock_get_recipe.assert_called_once_with('https://example.com/r?id=7')
+        assert get_cache_keys('example.com/') == ['example.com/r']
+
+
+@pytest.fixture(scope="class")
+def redis_env():
+    """Point Redis settings at a fake host for a whole test class"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('REDIS_HOST', 'test-redis')
+        mp.setenv('REDIS_PORT', '6379')
+        yield
+
+
+@pytest.fixture
+def redis_mock(monkeypatch):
+    """Replace redis.Redis with a Mock class; returns the client instance it builds"""
+    import redis
+    client = MagicMock()
+    monkeypatch.setattr(redis, 'Redis', MagicMock(return_value=client))
+    return client
+
+
+@pytest.mark.usefixtures('redis_env')
 class TestRedisRetry:
     """Test Redis connection retry logic"""
 
-    @patch('web.app.time.sleep')
-    @patch.dict(os.environ, {'REDIS_HOST': 'test-redis', 'REDIS_PORT': '6379'})
-    def test_redis_connection_success_first_attempt(self, mock_sleep):
+    def test_redis_connection_success_first_attempt(self, redis_mock):
         """Test successful Redis connection on first attempt"""
-        with patch('redis.Redis') as mock_redis_class:
-            mock_redis_instance = MagicMock()
-            mock_redis_instance.ping.return_value = True
-            mock_redis_class.return_value = mock_redis_instance
+        import redis
+        redis_mock.ping.return_value = True
+        delays = []
 
-            client, success = connect_to_redis_with_retry(max_retries=3)
+        client, success = connect_to_redis_with_retry(max_retries=3, sleeper=delays.append)
 
-            assert success is True
-            assert client == mock_redis_instance
-            mock_redis_instance.ping.assert_called_once()
-            mock_sleep.assert_not_called()
+        assert success is True
+        assert client == redis_mock
+        redis_mock.ping.assert_called_once()
+        redis.Redis.assert_called_once()
+        assert redis.Redis.call_args.kwargs['host'] == 'test-redis'
+        assert redis.Redis.call_args.kwargs['decode_responses'] is False
+        assert delays == []
 
-    @patch('web.app.time.sleep')
-    @patch.dict(os.environ, {'REDIS_HOST': 'test-redis', 'REDIS_PORT': '6379'})
-    def test_redis_connection_retry_then_success(self, mock_sleep):
+    def test_redis_connection_retry_then_success(self, redis_mock):
         """Test Redis connection succeeds after retry"""
-        with patch('redis.Redis') as mock_redis_class:
-            mock_redis_instance = MagicMock()
-            # Fail twice, then succeed
-            mock_redis_instance.ping.side_effect = [
-                Exception("Connection refused"),
-                Exception("Connection refused"),
-                True
-            ]
-            mock_redis_class.return_value = mock_redis_instance
-
-            client, success = connect_to_redis_with_retry(max_retries=5)
-
-            assert success is True
-            assert client == mock_redis_instance
-            assert mock_redis_instance.ping.call_count == 3
-            # Should sleep twice (after 1st and 2nd failures)
-            assert mock_sleep.call_count == 2
-            # Check exponential backoff: 1s, 2s
-            mock_sleep.assert_any_call(1)
-            mock_sleep.assert_any_call(2)
-
-    @patch('web.app.time.sleep')
-    @patch.dict(os.environ, {'REDIS_HOST': 'test-redis', 'REDIS_PORT': '6379'})
-    def test_redis_connection_all_retries_fail(self, mock_sleep):
+        # Fail twice, then succeed
+        redis_mock.ping.side_effect = [
+            Exception("Connection refused"),
+            Exception("Connection refused"),
+            True
+        ]
+        delays = []
+
+        client, success = connect_to_redis_with_retry(max_retries=5, sleeper=delays.append)
+
+        assert success is True
+        assert client == redis_mock
+        assert redis_mock.ping.call_count == 3
+        # Sleeps after the 1st and 2nd failures with exponential backoff: 1s, 2s
+        assert delays == [1, 2]
+
+    def test_redis_connection_all_retries_fail(self, redis_mock):
         """Test Redis connection fails after all retries"""
-        with patch('redis.Redis') as mock_redis_class:
-            mock_redis_instance = MagicMock()
-            mock_redis_instance.ping.side_effect = Exception("Connection refused")
-            mock_redis_class.return_value = mock_redis_instance
+        redis_mock.ping.side_effect = Exception("Connection refused")
+        delays = []
 
-            client, success = connect_to_redis_with_retry(max_retries=3)
+        client, success = connect_to_redis_with_retry(max_retries=3, sleeper=delays.append)
 
-            assert success is False
-            assert client is None
-            assert mock_redis_instance.ping.call_count == 3
-            # Should sleep twice (after 1st and 2nd failures, not after last)
-            assert mock_sleep.call_count == 2
+        assert success is False
+        assert client is None
+        assert redis_mock.ping.call_count == 3
+        # Should sleep twice (after 1st and 2nd failures, not after last)
+        assert delays == [1, 2]
 
     def test_redis_connection_module_not_available(self):
         """Test handling when redis module is not available"""
         with patch.dict('sys.modules', {'redis': None}):
-            with patch('web.app.logger') as mock_logger:
+            with patch('web.utils.logger') as mock_logger:
                 # This will cause ImportError
                 client, success = connect_to_redis_with_retry(max_retries=1)
 
@@ -1,200 +1,113 @@
-from flask import Flask, request, render_template, redirect
+from flask import Flask, request, render_template, redirect, make_response
+from jinja2 import FileSystemBytecodeCache
 import json
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from lxml import etree, html as lxml_html
 import re
 import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import atexit
 import sys
 import traceback
 import os
 import time
-import argparse
+import random
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from cachetools import TTLCache
 from urllib.parse import quote, unquote
 
-# URL normalization helpers
-def normalize_url_for_path(url):
-    """Convert full URL to clean path format (remove protocol and www)"""
-    # Remove protocol
-    clean = re.sub(r'^https?://', '', url)
-    # Remove www.
-    clean = re.sub(r'^www\.', '', clean)
-    return clean
-
-def denormalize_path_to_url(path):
-    """Convert clean path back to full URL (add https://)"""
-    # Try with https:// first
-    url = f"https://{path}"
-    return url
-
-def denormalize_path_to_url_with_www(path):
-    """Convert clean path to full URL with www. prefix"""
-    # Some sites require www.
-    if not path.startswith('www.'):
-        return f"https://www.{path}"
-    return f"https://{path}"
-
-# Configure logging for k8s
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    stream=sys.stdout
-)
+# orjson decodes large JSON-LD blobs several times faster than the stdlib;
+# fall back to json when it isn't installed. orjson.JSONDecodeError subclasses
+# json.JSONDecodeError, so existing error handling covers both. json_dumps
+# returns bytes under orjson and str otherwise; Redis accepts either.
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    orjson = None
+    json_loads = json.loads
+    json_dumps = json.dumps
+
+# Pure helpers live in utils.py. Gunicorn imports this module as "app" from
+# inside web/, while the tests import it as web.app from the repo root.
+try:
+    from web.utils import (
+        normalize_url_for_path, denormalize_path_to_url, denormalize_path_to_url_with_www,
+        format_duration, flatten_instructions, extract_domain, get_recipe_slug,
+        connect_to_redis_with_retry, redis_glob_escape, extract_nyt_recipe_id
+    )
+except ImportError:
+    from utils import (
+        normalize_url_for_path, denormalize_path_to_url, denormalize_path_to_url_with_www,
+        format_duration, flatten_instructions, extract_domain, get_recipe_slug,
+        connect_to_redis_with_retry, redis_glob_escape, extract_nyt_recipe_id
+    )
+
+# Configure logging for k8s. Request threads only put records on a queue; a
+# listener thread formats them and writes to stdout, so a slow log pipe never
+# holds up a request. The QueueHandler renders just the message (and any
+# traceback) so the stdout handler's format isn't applied twice.
+log_queue = queue.SimpleQueue()
+log_stream_handler = logging.StreamHandler(sys.stdout)
+log_stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+log_queue_handler = QueueHandler(log_queue)
+log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+logging.basicConfig(level=logging.INFO, handlers=[log_queue_handler])
+log_listener = QueueListener(log_queue, log_stream_handler, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)  # flush queued records on shutdown
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Helper function to format ISO 8601 durations
-def format_duration(duration_str):
-    """Convert ISO 8601 duration (e.g., 'PT0H45M') to readable format (e.g., '45 minutes')"""
-    if not duration_str or not isinstance(duration_str, str):
-        return duration_str
-
-    # If it's already readable (doesn't start with PT), return as is
-    if not duration_str.startswith('PT'):
-        return duration_str
-
-    # Parse ISO 8601 duration format: PT#H#M or PT#M
-    import re
-    pattern = r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?'
-    match = re.match(pattern, duration_str)
-
-    if not match:
-        return duration_str
-
-    hours = int(match.group(1)) if match.group(1) else 0
-    minutes = int(match.group(2)) if match.group(2) else 0
-    seconds = int(match.group(3)) if match.group(3) else 0
-
-    parts = []
-    if hours > 0:
-        parts.append(f"{hours} {'hour' if hours == 1 else 'hours'}")
-    if minutes > 0:
-        parts.append(f"{minutes} {'minute' if minutes == 1 else 'minutes'}")
-    if seconds > 0 and hours == 0:  # Only show seconds if no hours
-        parts.append(f"{seconds} {'second' if seconds == 1 else 'seconds'}")
-
-    return ' '.join(parts) if parts else duration_str
-
-# Helper function to flatten recipe instructions
-def flatten_instructions(instructions):
-    """Flatten recipe instructions that may contain HowToSection objects"""
-    if not instructions:
-        return []
-
-    logger.info(f"Flattening instructions, type: {type(instructions)}, length: {len(instructions) if hasattr(instructions, '__len__') else 'N/A'}")
-    logger.info(f"First item type: {type(instructions[0]) if instructions else 'N/A'}")
-    if instructions and len(instructions) > 1:
-        logger.info(f"Second item: {instructions[1]}")
-
-    flattened = []
-    for i, item in enumerate(instructions):
-        if isinstance(item, dict):
-            # Check if it's a HowToSection
-            if item.get('@type') == 'HowToSection':
-                # Extract steps from itemListElement
-                if 'itemListElement' in item:
-                    item_list = item['itemListElement']
-                    # itemListElement can be either a list or a single dict
-                    if isinstance(item_list, list):
-                        # It's a list of steps
-                        for step in item_list:
-                            if isinstance(step, dict):
-                                flattened.append(step.get('text', str(step)))
-                            else:
-                                flattened.append(str(step))
-                    elif isinstance(item_list, dict):
-                        # It's a single step
-                        flattened.append(item_list.get('text', str(item_list)))
-            # Check for text field (works for HowToStep and other formats)
-            elif 'text' in item:
-                flattened.append(item['text'])
-            # Check for name field as fallback
-            elif 'name' in item:
-                flattened.append(item['name'])
-            # Only add the stringified version if we really can't find text
-            # This prevents showing raw JSON metadata
-            elif isinstance(item, dict) and len(item) == 1:
-                # Single-value dict, use the value
-                flattened.append(str(list(item.values())[0]))
-            else:
-                logger.warning(f"Instruction item {i} is dict but has no text/name: {item}")
-        elif isinstance(item, str):
-            # Plain string instruction
-            flattened.append(item)
-        else:
-            logger.warning(f"Instruction item {i} is unexpected type {type(item)}: {item}")
-
-    return flattened
-
-# Helper function to extract domain from path
-def extract_domain(path_or_url):
-    """Extract the domain from a URL or path"""
-    if not path_or_url:
-        return None
-
-    # Remove leading slash if present
-    clean = path_or_url.lstrip('/')
-
-    # Remove protocol if present
-    clean = clean.replace('https://', '').replace('http://', '')
+# Compile templates once per process. Flask builds a single Jinja environment and
+# caches compiled templates, but in debug mode it also stats every template on
+# each render to pick up edits. Opt back in with TEMPLATES_AUTO_RELOAD=1.
+# Must be set before app.jinja_env is first touched (filter registration below).
+app.config['TEMPLATES_AUTO_RELOAD'] = os.getenv('TEMPLATES_AUTO_RELOAD') == '1'
 
-    # Extract just the domain (everything before the first /)
-    domain = clean.split('/')[0] if '/' in clean else clean
-
-    return domain if domain else None
+# Drop the whitespace that block tags leave behind so rendered cards are smaller.
+# Autoescaping stays on (Flask default for .html): recipe data comes from
+# third-party pages and must not be trusted as markup.
+app.jinja_options = {**app.jinja_options, 'trim_blocks': True, 'lstrip_blocks': True}
 
 # Register Jinja2 filters
 app.jinja_env.filters['format_duration'] = format_duration
 app.jinja_env.filters['flatten_instructions'] = flatten_instructions
 app.jinja_env.filters['extract_domain'] = extract_domain
 
-# Parse command-line arguments
-parser = argparse.ArgumentParser(description='NYetcooking Flask App')
-parser.add_argument('--no-cache', action='store_true',
-                    help='Skip Redis connection and use in-memory cache only')
-args, unknown = parser.parse_known_args()
-
-# Redis setup with fallback to in-memory cache
-def connect_to_redis_with_retry(max_retries=5, initial_delay=1):
-    """
-    Attempt to connect to Redis with exponential backoff.
-    Returns tuple: (redis_client, success_bool)
-    """
-    try:
-        import redis
-    except ImportError:
-        logger.warning("Redis module not available")
-        return None, False
-
-    redis_host = os.getenv('REDIS_HOST', 'localhost')
-    redis_port = int(os.getenv('REDIS_PORT', '6379'))
-
-    for attempt in range(1, max_retries + 1):
-        try:
-            logger.info(f"Attempting to connect to Redis at {redis_host}:{redis_port} (attempt {attempt}/{max_retries})")
-            client = redis.Redis(
-                host=redis_host,
-                port=redis_port,
-                db=0,
-                decode_responses=True,
-                socket_connect_timeout=5
-            )
-            # Test connection
-            client.ping()
-            logger.info(f"Redis connected successfully at {redis_host}:{redis_port}")
-            return client, True
-        except Exception as e:
-            if attempt < max_retries:
-                delay = initial_delay * (2 ** (attempt - 1))  # Exponential backoff
-                logger.warning(f"Redis connection attempt {attempt} failed: {e}. Retrying in {delay}s...")
-                time.sleep(delay)
-            else:
-                logger.warning(f"Redis connection failed after {max_retries} attempts: {e}")
-                logger.info("Falling back to in-memory cache")
-                return None, False
+# Persist compiled template bytecode so new workers skip the Jinja compile step
+jinja_cache_dir = os.getenv('JINJA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'nyetcooking-jinja'))
+try:
+    os.makedirs(jinja_cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(jinja_cache_dir, '%s.cache')
+except OSError as e:
+    logger.warning("Jinja bytecode cache disabled, could not use %s: %s", jinja_cache_dir, e)
+
+# How long a cached recipe lives, in Redis and in the in-memory fallback
+RECIPE_CACHE_TTL = int(os.getenv('RECIPE_CACHE_TTL', str(30 * 24 * 3600)))  # 30 days
+
+# Redis hash mapping NYT recipe ids to the slug their recipe is cached under.
+# NYT slugs start with the recipe id, which is how deletes find their entry.
+NYT_ID_INDEX_KEY = "nyt_id_index"
+NYT_SLUG_ID_RE = re.compile(r'(\d{1,10})-')
+# Set once recipes cached before the index existed have been indexed
+NYT_ID_INDEX_BACKFILLED_KEY = "nyt_id_index:backfilled"
+
+# Command-line flags. The only one is --no-cache (skip Redis connection and use
+# in-memory cache only); a plain argv scan avoids building an argparse parser
+# at import time in every Gunicorn worker, which never passes app flags anyway.
+NO_CACHE = '--no-cache' in sys.argv[1:]
 
 # Check if --no-cache flag was provided
-if args.no_cache:
+if NO_CACHE:
     logger.info("--no-cache flag detected, skipping Redis connection")
     redis_client, USE_REDIS = None, False
 else:
@@ -202,173 +115,603 @@ else:
 
 # Log startup information immediately
 logger.info("=== Nyetcooking Flask App Initializing ===")
-logger.info(f"Python version: {sys.version}")
-logger.info(f"Flask app name: {app.name}")
-logger.info(f"Cache backend: {'Redis' if USE_REDIS else 'In-memory'}")
+logger.info("Python version: %s", sys.version)
+logger.info("Flask app name: %s", app.name)
+logger.info("Cache backend: %s", 'Redis' if USE_REDIS else 'In-memory')
 logger.info("Available routes will be logged after app creation")
 
 @app.before_request
 def log_request():
-    logger.info(f"Request: {request.method} {request.url}")
-    if request.form:
-        logger.info(f"Form data: {dict(request.form)}")
+    # Tracing only; log_response below is the one line per request kept at INFO
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Request: %s %s", request.method, request.url)
+        if request.form:
+            logger.debug("Form fields: %s", list(request.form))
 
 @app.after_request
 def log_response(response):
-    logger.info(f"Response: {response.status_code} for {request.url}")
+    logger.info("Response: %s for %s", response.status_code, request.url)
     return response
 
 # Cache helper functions
 def cache_recipe(slug, recipe_data, original_url):
-    """Store recipe in cache (Redis or in-memory)"""
+    """
+    Store recipe in cache (Redis or in-memory), along with its markdown export
+    so /markdown requests don't rebuild it. Returns the cached entry.
+    """
     cache_data = {
         'recipe': recipe_data,
-        'original_url': original_url
+        'original_url': original_url,
+        'markdown': recipe_to_markdown(recipe_data, original_url)
     }
+    # Replace both per-worker copies up front, so neither can shadow this
+    # write even if the Redis write below fails and lands in recipe_cache
+    forget_rendered_cards(slug)
 
     if USE_REDIS:
+        with recipe_cache_lock:
+            local_recipe_cache[slug] = cache_data
         try:
-            redis_client.setex(f"recipe:{slug}", 2592000, json.dumps(cache_data))  # 30 day TTL (1 month)
-            logger.info(f"Cached recipe '{slug}' in Redis")
+            # Index NYT recipes by id in the same round trip, so /recipes/<id>
+            # finds the cached slug with one HGET instead of a SCAN
+            nyt_id = extract_nyt_recipe_id(original_url)
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.setex(f"recipe:{slug}", RECIPE_CACHE_TTL, json_dumps(cache_data))
+            if nyt_id:
+                pipe.hset(NYT_ID_INDEX_KEY, nyt_id, slug)
+            pipe.execute()
+            logger.info("Cached recipe '%s' in Redis", slug)
         except Exception as e:
-            logger.error(f"Redis cache failed, falling back to memory: {e}")
-            recipe_cache[slug] = cache_data
+            logger.error("Redis cache failed, falling back to memory: %s", e)
+            with recipe_cache_lock:
+                recipe_cache[slug] = cache_data
     else:
-        recipe_cache[slug] = cache_data
-        logger.info(f"Cached recipe '{slug}' in memory")
+        with recipe_cache_lock:
+            recipe_cache[slug] = cache_data
+        logger.info("Cached recipe '%s' in memory", slug)
+
+    return cache_data
 
 def get_cached_recipe(slug):
     """Retrieve recipe from cache (Redis or in-memory)"""
     if USE_REDIS:
+        with recipe_cache_lock:
+            cached = local_recipe_cache.get(slug)
+        if cached:
+            logger.debug("Retrieved recipe '%s' from local cache", slug)
+            return cached
         try:
             cached = redis_client.get(f"recipe:{slug}")
             if cached:
-                logger.info(f"Retrieved recipe '{slug}' from Redis")
-                return json.loads(cached)
+                logger.debug("Retrieved recipe '%s' from Redis", slug)
+                cached = json_loads(cached)
+                with recipe_cache_lock:
+                    local_recipe_cache[slug] = cached
+                return cached
             else:
-                logger.info(f"Recipe '{slug}' not found in Redis")
+                logger.debug("Recipe '%s' not found in Redis", slug)
                 return None
         except Exception as e:
-            logger.error(f"Redis get failed, falling back to memory: {e}")
-            return recipe_cache.get(slug)
+            logger.error("Redis get failed, falling back to memory: %s", e)
+            with recipe_cache_lock:
+                return recipe_cache.get(slug)
     else:
-        cached = recipe_cache.get(slug)
+        with recipe_cache_lock:
+            cached = recipe_cache.get(slug)
         if cached:
-            logger.info(f"Retrieved recipe '{slug}' from memory")
+            logger.debug("Retrieved recipe '%s' from memory", slug)
         else:
-            logger.info(f"Recipe '{slug}' not found in memory")
+            logger.debug("Recipe '%s' not found in memory", slug)
         return cached
 
-def get_cache_keys():
-    """Get all cache keys for debugging"""
+def get_cache_keys(prefix=''):
+    """
+    Get cached recipe slugs, optionally only those starting with prefix.
+    Redis is walked with SCAN (filtered server-side by MATCH) rather than KEYS,
+    which would block the server while it walks the whole keyspace.
+    """
     if USE_REDIS:
         try:
-            keys = redis_client.keys("recipe:*")
-            # Strip the "recipe:" prefix for consistency
-            return [key.replace("recipe:", "") for key in keys]
+            match = f"recipe:{redis_glob_escape(prefix)}*"
+            # Replies are bytes; strip the "recipe:" prefix for consistency
+            return [key.decode().removeprefix("recipe:")
+                    for key in redis_client.scan_iter(match=match, count=500)]
         except Exception as e:
-            logger.error(f"Redis keys failed: {e}")
-            return list(recipe_cache.keys())
-    else:
-        return list(recipe_cache.keys())
+            logger.error("Redis scan failed: %s", e)
+    with recipe_cache_lock:
+        return [key for key in recipe_cache.keys() if key.startswith(prefix)]
 
-def delete_cached_recipe(slug):
-    """Delete recipe from cache (Redis or in-memory)"""
+def find_cached_nyt_recipe(recipe_id):
+    """
+    Find a cached NYT recipe by id whatever its slug. Redis looks the slug up
+    in the id index, dropping the entry if its recipe has expired; an index
+    miss is a cache miss. The in-memory cache (also used while Redis calls
+    fail) is filtered by id prefix instead.
+    """
     if USE_REDIS:
         try:
-            deleted = redis_client.delete(f"recipe:{slug}")
-            if deleted:
-                logger.info(f"Deleted recipe '{slug}' from Redis")
-            else:
-                logger.info(f"Recipe '{slug}' not found in Redis for deletion")
+            slug = redis_client.hget(NYT_ID_INDEX_KEY, recipe_id)
+            if not slug:
+                return None
+            cached_data = get_cached_recipe(slug.decode())
+            if not cached_data:
+                redis_client.hdel(NYT_ID_INDEX_KEY, recipe_id)
+            return cached_data
         except Exception as e:
-            logger.error(f"Redis delete failed, falling back to memory: {e}")
-            if slug in recipe_cache:
-                del recipe_cache[slug]
-                logger.info(f"Deleted recipe '{slug}' from memory")
-    else:
-        if slug in recipe_cache:
-            del recipe_cache[slug]
-            logger.info(f"Deleted recipe '{slug}' from memory")
-        else:
-            logger.info(f"Recipe '{slug}' not found in memory for deletion")
+            logger.error("Redis id lookup failed, falling back to memory: %s", e)
+    prefix = f"{recipe_id}-"
+    with recipe_cache_lock:
+        for key, cached_data in recipe_cache.items():
+            if key.startswith(prefix):
+                return cached_data
+    return None
+
+def backfill_nyt_id_index(batch_size=500):
+    """
+    Index NYT recipes cached before nyt_id_index existed. Runs once per Redis
+    database: the first worker to claim the marker key walks the recipe keys
+    with SCAN and adds the ids the index doesn't have yet, so the request path
+    never has to scan. If it fails the marker is released for the next start.
+    """
+    try:
+        if not redis_client.set(NYT_ID_INDEX_BACKFILLED_KEY, 1, nx=True):
+            return
+        pipe = redis_client.pipeline(transaction=False)
+        queued = indexed = 0
+        for key in redis_client.scan_iter(match="recipe:*", count=batch_size):
+            slug = key.decode().removeprefix("recipe:")
+            match = NYT_SLUG_ID_RE.match(slug)
+            if match:
+                pipe.hsetnx(NYT_ID_INDEX_KEY, match.group(1), slug)
+                queued += 1
+            if queued == batch_size:
+                indexed += sum(pipe.execute())
+                queued = 0
+        if queued:
+            indexed += sum(pipe.execute())
+        logger.info("Backfilled %s NYT recipe id(s) into the id index", indexed)
+    except Exception as e:
+        logger.error("NYT id index backfill failed: %s", e)
+        try:
+            redis_client.delete(NYT_ID_INDEX_BACKFILLED_KEY)
+        except Exception:
+            pass
+
+def delete_cached_recipe(*slugs):
+    """Delete one or more recipes from cache (Redis or in-memory), in a single Redis call"""
+    if not slugs:
+        return
+    # Drop both per-worker copies (rendered cards and decoded recipes) together
+    forget_rendered_cards(*slugs)
+    if USE_REDIS:
+        with recipe_cache_lock:
+            for slug in slugs:
+                local_recipe_cache.pop(slug, None)
+        try:
+            # Drop the id index entries of any NYT slugs in the same round trip
+            nyt_ids = {match.group(1) for match in map(NYT_SLUG_ID_RE.match, slugs) if match}
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.delete(*(f"recipe:{slug}" for slug in slugs))
+            if nyt_ids:
+                pipe.hdel(NYT_ID_INDEX_KEY, *nyt_ids)
+            deleted = pipe.execute()[0]
+            logger.info("Deleted %s of %s recipe(s) %s from Redis", deleted, len(slugs), list(slugs))
+            return
+        except Exception as e:
+            logger.error("Redis delete failed, falling back to memory: %s", e)
+    with recipe_cache_lock:
+        deleted = sum(recipe_cache.pop(slug, None) is not None for slug in slugs)
+    logger.info("Deleted %s of %s recipe(s) %s from memory", deleted, len(slugs), list(slugs))
+
+if USE_REDIS:
+    backfill_nyt_id_index()
+
+# Shared HTTP session so repeat fetches to the same recipe host reuse
+# keep-alive connections instead of paying a new TCP+TLS handshake each time.
+# Accept-Encoding is left to requests/urllib3, which advertise br alongside
+# gzip/deflate whenever the brotli package is installed.
+http_session = requests.Session()
+http_session.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+})
+
+# Keep enough pooled connections per host for every Gunicorn thread plus a
+# prefetch batch. urllib3 only retries failures to open a connection, which
+# never reached the origin; read errors and 429/5xx answers are left to
+# get_recipe_with_retry, so a failing origin isn't retried at two levels.
+http_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=2,
+        connect=2,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=0.5,
+        allowed_methods=frozenset({'GET'}),
+        raise_on_status=False,
+    ),
+)
+http_session.mount('https://', http_adapter)
+http_session.mount('http://', http_adapter)
 
-def get_recipe_with_retry(url, max_retries=2):
-    """Fetch recipe with retry logic and exponential backoff"""
-    last_error = None
+# (connect, read) timeouts: fail fast on unreachable hosts, but give slow
+# recipe pages time to stream
+REQUEST_TIMEOUT = (3.05, 15)
 
-    # Don't retry on these permanent errors
-    permanent_errors = ["HTTP 404", "HTTP 403", "HTTP 401", "Could not find"]
+class TransientFetchError(ValueError):
+    """Fetch failure worth retrying: timeouts, connection errors, 408/429 and 5xx"""
+
+class PermanentFetchError(ValueError):
+    """Fetch failure a retry can't fix: other 4xx answers, bad URLs, pages without a recipe"""
+
+# Client errors that may clear up on their own
+RETRIABLE_CLIENT_STATUSES = (408, 429)
+
+def http_fetch_error(status_code):
+    """Build the error for a non-200 answer, classified by status code"""
+    permanent = 400 <= status_code < 500 and status_code not in RETRIABLE_CLIENT_STATUSES
+    error_class = PermanentFetchError if permanent else TransientFetchError
+    return error_class(f"HTTP {status_code}: Failed to fetch recipe page")
+
+# "HTTP 404: ..." messages on errors raised without a fetch error class
+HTTP_ERROR_RE = re.compile(r'HTTP (\d{3})\b')
+
+def is_permanent_fetch_error(error):
+    """
+    True for failures a retry can't fix: client errors other than 408/429 and
+    pages without a usable recipe. Timeouts, connection errors and 5xx are
+    worth retrying. Errors raised by the fetch path carry their class; anything
+    else is classified by its message.
+    """
+    if isinstance(error, PermanentFetchError):
+        return True
+    if isinstance(error, TransientFetchError):
+        return False
+    error_msg = str(error)
+    match = HTTP_ERROR_RE.match(error_msg)
+    if match:
+        status = int(match.group(1))
+        return 400 <= status < 500 and status not in RETRIABLE_CLIENT_STATUSES
+    return "Could not find" in error_msg
+
+def get_recipe_with_retry(url, max_retries=2, *, sleeper=None, base_delay=1.0, max_delay=30, jitter=0.5):
+    """
+    Fetch recipe with retry logic and jittered exponential backoff.
+    The nth retry waits base_delay * 2**(n-1), stretched by up to `jitter`
+    so clients that failed together don't retry in lockstep, capped at max_delay.
+    sleeper is called with each backoff delay (defaults to time.sleep).
+    """
+    sleeper = sleeper or time.sleep
+    last_error = None
 
     for attempt in range(1, max_retries + 1):
         try:
-            logger.info(f"Fetching recipe (attempt {attempt}/{max_retries})")
+            logger.info("Fetching recipe (attempt %s/%s)", attempt, max_retries)
             return get_recipe(url)
         except Exception as e:
             last_error = e
-            error_msg = str(e)
 
             # Don't retry on permanent errors
-            if any(perm_err in error_msg for perm_err in permanent_errors):
-                logger.error(f"Permanent error detected: {e}. Not retrying.")
+            if is_permanent_fetch_error(e):
+                logger.error("Permanent error detected: %s. Not retrying.", e)
                 raise e
 
             if attempt < max_retries:
-                # Exponential backoff: 1s, 2s, 4s...
-                delay = 2 ** (attempt - 1)
-                logger.warning(f"Attempt {attempt} failed: {e}. Retrying in {delay}s...")
-                time.sleep(delay)
+                delay = min(max_delay, base_delay * (2 ** (attempt - 1)) * (1 + random.random() * jitter))
+                logger.warning("Attempt %s failed: %s. Retrying in %.2fs...", attempt, e, delay)
+                sleeper(delay)
             else:
-                logger.error(f"All {max_retries} attempts failed. Last error: {e}")
+                logger.error("All %s attempts failed. Last error: %s", max_retries, e)
 
     # If we get here, all retries failed
     raise last_error
 
+def prefetch_recipes(urls, max_workers=8):
+    """
+    Fetch and cache several recipe URLs concurrently.
+    Returns dict mapping each URL to its cache path, or None if the fetch failed.
+    """
+    def fetch_one(url):
+        # Any failure, including a URL too malformed to normalize, only costs
+        # this URL its result; the rest of the batch is still reported
+        try:
+            clean_path = normalize_url_for_path(url)
+            if not get_cached_recipe(clean_path):
+                cache_recipe(clean_path, get_recipe_with_retry(url), url)
+            return clean_path
+        except Exception as e:
+            logger.warning("Prefetch failed for %s: %s", url, e)
+            return None
+
+    # Fetches are network-bound, so threads overlap the round trips
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique_urls))) as executor:
+        return dict(zip(unique_urls, executor.map(fetch_one, unique_urls)))
+
+# How long the preferred URL variant gets to answer before the next one is
+# tried alongside it: one connect timeout, so an unreachable host is hedged but
+# a page that's merely slow to download isn't fetched twice.
+VARIANT_HEDGE_SECONDS = REQUEST_TIMEOUT[0]
+
+def fetch_first_variant(urls):
+    """
+    Fetch a recipe that may live under several URL spellings (e.g. with and
+    without www.), preferring them in the order given. Each variant is only
+    started once the ones before it have failed, or have gone
+    VARIANT_HEDGE_SECONDS without an answer. Returns (recipe_json, url) for the
+    first variant to succeed, the most preferred one if several already have,
+    or (None, None). A slower variant still in flight is abandoned rather than
+    waited for; it ends on its own timeouts.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    executor = ThreadPoolExecutor(max_workers=len(unique_urls))
+    attempts = []
+
+    def log_failure(url, future):
+        if not future.cancelled() and future.exception():
+            logger.warning("Failed to fetch from %s: %s", url, future.exception())
+
+    def first_success():
+        for url, future in attempts:
+            if future.done() and not future.exception() and future.result():
+                logger.info("Successfully fetched from %s", url)
+                return future.result(), url
+        return None
+
+    try:
+        for i, url in enumerate(unique_urls):
+            future = executor.submit(get_recipe_with_retry, url, max_retries=2)
+            future.add_done_callback(lambda f, url=url: log_failure(url, f))
+            attempts.append((url, future))
+            # The last variant has no hedge window: wait until everything is done
+            deadline = time.monotonic() + VARIANT_HEDGE_SECONDS if i < len(unique_urls) - 1 else None
+            while True:
+                result = first_success()
+                if result:
+                    return result
+                pending = [f for _, f in attempts if not f.done()]
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if not pending or (remaining is not None and remaining <= 0):
+                    break
+                wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        return None, None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+# Validators (ETag/Last-Modified) and the extracted recipe for recently fetched
+# URLs. Within FETCH_FRESH_SECONDS of a fetch the recipe is reused without
+# touching the network; after that, re-fetching an unchanged page costs a 304
+# instead of a full download and parse. Bounded LRU; each entry is a parsed
+# recipe, not the raw page.
+REVALIDATION_CACHE_SIZE = 128
+FETCH_FRESH_SECONDS = 600
+revalidation_cache = OrderedDict()
+revalidation_lock = threading.Lock()
+
+# Fetches currently in progress, by URL. Concurrent requests for the same page
+# (a shared link, a double submit) wait on the first fetch instead of each
+# downloading and parsing it.
+inflight_fetches = {}
+inflight_lock = threading.Lock()
+
 def get_recipe(url):
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    """Fetch a recipe page and extract its JSON-LD Recipe object"""
+    with inflight_lock:
+        future = inflight_fetches.get(url)
+        leader = future is None
+        if leader:
+            future = inflight_fetches[url] = Future()
+
+    if not leader:
+        logger.info("Waiting on in-flight fetch of %s", url)
+        return future.result()
+
+    try:
+        recipe_json = fetch_and_extract_recipe(url)
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(recipe_json)
+        return recipe_json
+    finally:
+        with inflight_lock:
+            del inflight_fetches[url]
+
+def fetch_and_extract_recipe(url):
+    """Fetch (or revalidate) a recipe page and extract its recipe, without coalescing"""
+    with revalidation_lock:
+        known = revalidation_cache.get(url)
+
+    if known and known['fetched_at'] is not None \
+            and time.monotonic() - known['fetched_at'] < FETCH_FRESH_SECONDS:
+        logger.info("Reusing recipe fetched from %s in the last %ss", url, FETCH_FRESH_SECONDS)
+        return known['recipe']
+
+    content, validators = fetch_recipe_page(url, known['validators'] if known else None)
+    if content is None:
+        logger.info("Origin reports %s unchanged, reusing previously extracted recipe", url)
+        recipe_json = known['recipe']
+    else:
+        recipe_json = extract_recipe_from_html(content)
+
+    with revalidation_lock:
+        revalidation_cache[url] = {
+            'validators': validators,
+            'recipe': recipe_json,
+            'fetched_at': time.monotonic()
+        }
+        revalidation_cache.move_to_end(url)
+        while len(revalidation_cache) > REVALIDATION_CACHE_SIZE:
+            revalidation_cache.popitem(last=False)
+
+    return recipe_json
 
-    logger.info(f"Fetching URL: {url}")
+def expire_fetched_recipes(*urls):
+    """Make the next get_recipe for these URLs go back to the origin (used by ?refresh=1)"""
+    with revalidation_lock:
+        for url in urls:
+            if url in revalidation_cache:
+                revalidation_cache[url]['fetched_at'] = None
+
+def fetch_recipe_page(url, validators=None):
+    """
+    Fetch a recipe page once.
+    Returns tuple: (content, validators). content is None when the origin
+    answers 304 Not Modified to the conditional headers built from validators.
+    """
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+    logger.info("Fetching URL: %s", url)
     try:
-        res = requests.get(url, headers=headers, timeout=15)
-        logger.info(f"Response status: {res.status_code}")
+        with http_session.get(url, headers=headers, timeout=REQUEST_TIMEOUT, stream=True) as res:
+            logger.debug("Response status: %s", res.status_code)
+
+            if res.status_code == 304 and validators:
+                return None, validators
+
+            if res.status_code != 200:
+                logger.error("HTTP error %s when fetching %s", res.status_code, url)
+                raise http_fetch_error(res.status_code)
 
-        if res.status_code != 200:
-            logger.error(f"HTTP error {res.status_code} when fetching {url}")
-            raise ValueError(f"HTTP {res.status_code}: Failed to fetch recipe page")
+            content = read_recipe_page(res)
 
     except requests.exceptions.Timeout:
-        logger.error(f"Timeout when fetching {url}")
-        raise ValueError("Request timed out when fetching recipe page")
+        logger.error("Timeout when fetching %s", url)
+        raise TransientFetchError("Request timed out when fetching recipe page")
     except requests.exceptions.ConnectionError as e:
-        logger.error(f"Connection error when fetching {url}: {e}")
-        raise ValueError("Connection error when fetching recipe page")
+        logger.error("Connection error when fetching %s: %s", url, e)
+        raise TransientFetchError("Connection error when fetching recipe page")
+    except (requests.exceptions.URLRequired, requests.exceptions.MissingSchema,
+            requests.exceptions.InvalidSchema, requests.exceptions.InvalidURL) as e:
+        logger.error("Invalid URL %s: %s", url, e)
+        raise PermanentFetchError(f"Request error: {e}")
     except requests.exceptions.RequestException as e:
-        logger.error(f"Request error when fetching {url}: {e}")
-        raise ValueError(f"Request error: {e}")
+        logger.error("Request error when fetching %s: %s", url, e)
+        raise TransientFetchError(f"Request error: {e}")
+
+    new_validators = {
+        key: value for key, value in (
+            ('etag', res.headers.get('ETag')),
+            ('last_modified', res.headers.get('Last-Modified')),
+        ) if value
+    }
+    return content, new_validators
+
+# Byte-level patterns for the two script tags we read. Most pages declare them
+# plainly, so a regex scan finds them without building a DOM at all; anything
+# the scan can't resolve falls back to a full lxml parse.
+JSON_LD_SCRIPT_RE = re.compile(
+    rb'<script\b[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>',
+    re.DOTALL | re.IGNORECASE
+)
+NEXT_DATA_SCRIPT_RE = re.compile(
+    rb'<script\b[^>]*\bid\s*=\s*["\']?__NEXT_DATA__["\']?[^>]*>(.*?)</script\s*>',
+    re.DOTALL | re.IGNORECASE
+)
 
-    soup = BeautifulSoup(res.content, "html.parser")
-    script_tags = soup.find_all("script", attrs={"type": "application/ld+json"})
+# XPath equivalents for the lxml fallback, compiled once rather than per page.
+# text() hands back the script bodies directly; smart_strings=False makes them
+# plain str, which orjson requires (it rejects str subclasses).
+JSON_LD_SCRIPT_XPATH = etree.XPath('//script[@type="application/ld+json"]/text()', smart_strings=False)
+NEXT_DATA_SCRIPT_XPATH = etree.XPath('//script[@id="__NEXT_DATA__"]/text()', smart_strings=False)
 
-    logger.info(f"Found {len(script_tags)} JSON-LD script tags")
+PAGE_CHUNK_SIZE = 64 * 1024
+MAX_PAGE_BYTES = 10 * 1024 * 1024
 
-    if not script_tags:
-        raise ValueError("Could not find any JSON-LD scripts on page.")
+def read_recipe_page(res):
+    """
+    Read a streamed page body, stopping as soon as everything extraction needs
+    has arrived: a JSON-LD Recipe and, on Next.js pages, the __NEXT_DATA__
+    script. Recipe JSON-LD usually sits in <head>, so most of the body is
+    never downloaded. Closing early drops the connection instead of returning
+    it to the pool, which is cheaper than draining a long page.
+    """
+    buf = bytearray()
+    scanned = 0
+    recipe_seen = False
+
+    for chunk in res.iter_content(PAGE_CHUNK_SIZE):
+        buf += chunk
+        if len(buf) > MAX_PAGE_BYTES:
+            logger.warning("Page exceeds %s bytes, stopping read", MAX_PAGE_BYTES)
+            break
+
+        if not recipe_seen:
+            # Only look at complete script elements, i.e. up to the last
+            # closing tag; scripts can't nest, so nothing before it is partial
+            last_close = buf.rfind(b'</script')
+            close_end = buf.find(b'>', last_close) + 1 if last_close >= scanned else 0
+            if close_end:
+                scripts = [m.group(1) for m in JSON_LD_SCRIPT_RE.finditer(buf, scanned, close_end)]
+                scanned = close_end
+                recipe_seen = bool(scripts) and find_recipe_in_json_ld(scripts) is not None
+
+        if recipe_seen:
+            if b'__NEXT_DATA__' not in buf and b'/_next/' not in buf:
+                break
+            if NEXT_DATA_SCRIPT_RE.search(buf):
+                break
 
-    recipe_json = None
-    for i, script_tag in enumerate(script_tags):
+    return bytes(buf)
+
+def parse_html_document(content):
+    """Parse page content into an lxml document, handling charset quirks"""
+    # lxml assumes latin-1 for byte input without a <meta charset>, so hand it
+    # text when the page is valid UTF-8 (nearly every recipe site) and let it
+    # sniff the declared charset otherwise
+    if isinstance(content, bytes):
         try:
-            if not script_tag.string:
-                logger.warning(f"Script tag {i} has no content")
+            content = content.decode('utf-8')
+        except UnicodeDecodeError:
+            pass
+
+    try:
+        try:
+            return lxml_html.fromstring(content)
+        except ValueError:
+            # Text input with an <?xml encoding=...?> declaration is rejected
+            return lxml_html.fromstring(content.encode('utf-8'))
+    except etree.ParserError as e:
+        logger.error("Failed to parse page HTML: %s", e)
+        raise PermanentFetchError("Could not find any JSON-LD scripts on page.")
+
+# A script whose text never mentions "recipe" can't hold a Recipe @type, so
+# sitewide WebSite/Organization/BreadcrumbList blobs are skipped undecoded
+RECIPE_MARKER_RE = re.compile(r'recipe', re.IGNORECASE)
+RECIPE_MARKER_BYTES_RE = re.compile(rb'recipe', re.IGNORECASE)
+
+# Casefolded @type values accepted as a recipe when @type is a single string
+RECIPE_TYPES = frozenset({'recipe'})
+
+def find_recipe_in_json_ld(script_texts):
+    """Return the first Recipe object found in a list of JSON-LD script bodies"""
+    for i, script_text in enumerate(script_texts):
+        try:
+            if not script_text:
+                logger.warning("Script tag %s has no content", i)
                 continue
 
-            data = json.loads(script_tag.string.strip())
-            logger.info(f"Script tag {i} parsed successfully, type: {type(data)}")
+            marker_re = RECIPE_MARKER_BYTES_RE if isinstance(script_text, bytes) else RECIPE_MARKER_RE
+            if not marker_re.search(script_text):
+                logger.debug("Script tag %d never mentions a recipe, skipping", i)
+                continue
+
+            data = json_loads(script_text)
+            logger.debug("Script tag %d parsed successfully, type: %s", i, type(data))
 
             # Handle @graph format (used by some sites like Minimalist Baker, Yoast SEO)
             if isinstance(data, dict) and '@graph' in data:
-                logger.info(f"Found @graph with {len(data['@graph'])} items")
+                logger.debug("Found @graph with %d items", len(data['@graph']))
                 items = data['@graph']
             # Handle both single objects and arrays
             elif isinstance(data, list):
@@ -377,30 +720,61 @@ def get_recipe(url):
                 items = [data]
 
             for j, item in enumerate(items):
-                logger.info(f"Item {j} in script {i}: @type = {item.get('@type', 'unknown')}")
+                logger.debug("Item %d in script %d: @type = %s", j, i, item.get('@type', 'unknown'))
 
                 # Look for Recipe type (case insensitive)
                 item_type = item.get('@type', '')
-                if isinstance(item_type, str) and item_type.lower() in ['recipe']:
-                    recipe_json = item
-                    logger.info(f"Found Recipe in script {i}, item {j}")
-                    logger.info(f"Recipe name: {recipe_json.get('name', 'unnamed')}")
-                    break
-                elif isinstance(item_type, list) and any('recipe' in t.lower() for t in item_type):
-                    recipe_json = item
-                    logger.info(f"Found Recipe in script {i}, item {j} (list type)")
-                    logger.info(f"Recipe name: {recipe_json.get('name', 'unnamed')}")
-                    break
-
-            if recipe_json:
-                break
-
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse script tag {i}: {e}")
+                if isinstance(item_type, str) and item_type.casefold() in RECIPE_TYPES:
+                    logger.debug("Found Recipe in script %d, item %d: %s", i, j, item.get('name', 'unnamed'))
+                    return item
+                elif isinstance(item_type, list) and any('recipe' in t.casefold() for t in item_type):
+                    logger.debug("Found Recipe in script %d, item %d (list type): %s", i, j, item.get('name', 'unnamed'))
+                    return item
+
+        except ValueError as e:
+            # JSONDecodeError, or undecodable bytes from the byte-level scan
+            logger.error("Failed to parse script tag %s: %s", i, e)
             continue
 
+    return None
+
+def extract_recipe_from_html(content):
+    """Extract the Recipe object (plus NYT extras) from an already-fetched page"""
+    recipe_json = None
+    next_data_text = None
+
+    # Fast path: scan the raw bytes for the script bodies
+    if isinstance(content, bytes):
+        script_texts = [match.group(1) for match in JSON_LD_SCRIPT_RE.finditer(content)]
+        if script_texts:
+            logger.debug("Found %s JSON-LD script tags (byte scan)", len(script_texts))
+            recipe_json = find_recipe_in_json_ld(script_texts)
+        if recipe_json:
+            match = NEXT_DATA_SCRIPT_RE.search(content)
+            next_data_text = match.group(1) if match else None
+
+    # Slow path: full parse and XPath query for the script nodes. The XPath
+    # matches the type attribute exactly, so a page that never spells it out
+    # has nothing to find and isn't worth parsing.
     if not recipe_json:
-        raise ValueError("Could not find a Recipe object in any JSON-LD scripts.")
+        marker = b'application/ld+json' if isinstance(content, bytes) else 'application/ld+json'
+        if marker not in content:
+            raise PermanentFetchError("Could not find any JSON-LD scripts on page.")
+
+        doc = parse_html_document(content)
+        script_texts = JSON_LD_SCRIPT_XPATH(doc)
+
+        logger.debug("Found %s JSON-LD script tags", len(script_texts))
+
+        if not script_texts:
+            raise PermanentFetchError("Could not find any JSON-LD scripts on page.")
+
+        recipe_json = find_recipe_in_json_ld(script_texts)
+        if not recipe_json:
+            raise PermanentFetchError("Could not find a Recipe object in any JSON-LD scripts.")
+
+        next_data_scripts = NEXT_DATA_SCRIPT_XPATH(doc)
+        next_data_text = next_data_scripts[0] if next_data_scripts else None
 
     # Validate that we have essential recipe data
     if not recipe_json.get('name'):
@@ -410,14 +784,13 @@ def get_recipe(url):
     if not recipe_json.get('recipeInstructions'):
         logger.warning("Recipe has no instructions")
 
-    logger.info(f"Successfully extracted recipe: {recipe_json.get('name', 'unnamed')}")
+    logger.info("Successfully extracted recipe: %s", recipe_json.get('name', 'unnamed'))
 
     # Try to extract additional data from __NEXT_DATA__ (for NYT Cooking)
     try:
-        next_data_script = soup.find("script", attrs={"id": "__NEXT_DATA__"})
-        if next_data_script and next_data_script.string:
-            next_data = json.loads(next_data_script.string.strip())
-            logger.info("Found __NEXT_DATA__ block")
+        if next_data_text:
+            next_data = json_loads(next_data_text)
+            logger.debug("Found __NEXT_DATA__ block")
 
             # Navigate to recipe data in Next.js structure
             # Typical path: props.pageProps.recipe
@@ -432,46 +805,26 @@ def get_recipe(url):
                 tips = recipe_data.get('tip_data') or recipe_data.get('tips')
                 if tips:
                     recipe_json['tips'] = tips
-                    logger.info(f"Extracted {len(tips)} tips from __NEXT_DATA__")
+                    logger.debug("Extracted %s tips from __NEXT_DATA__", len(tips))
 
                 # You can extract other fields here as needed
                 # Example: notes, variations, etc.
                 if recipe_data.get('notes'):
                     recipe_json['notes'] = recipe_data['notes']
-                    logger.info("Extracted notes from __NEXT_DATA__")
+                    logger.debug("Extracted notes from __NEXT_DATA__")
             else:
-                logger.info("No recipe data found in __NEXT_DATA__")
+                logger.debug("No recipe data found in __NEXT_DATA__")
         else:
-            logger.info("No __NEXT_DATA__ script found on page")
+            logger.debug("No __NEXT_DATA__ script found on page")
     except Exception as e:
-        logger.warning(f"Failed to extract __NEXT_DATA__: {e}")
+        logger.warning("Failed to extract __NEXT_DATA__: %s", e)
         # Don't fail the whole request if __NEXT_DATA__ extraction fails
 
     return recipe_json
 
-def extract_nyt_recipe_id(url):
-    """Extract recipe ID from NYT Cooking URLs"""
-    # Pattern: https://cooking.nytimes.com/recipes/1234567890-recipe-name
-    match = re.search(r'cooking\.nytimes\.com/recipes/(\d+)', url)
-    return match.group(1) if match else None
-
-def get_recipe_slug(recipe_json, original_url=None):
-    """Generate slug from recipe name, optionally including NYT recipe ID"""
-    name = recipe_json.get('name', 'recipe')
-    slug = re.sub(r'[^a-zA-Z0-9\s-]', '', name)
-    slug = re.sub(r'\s+', '-', slug.strip())
-    slug = slug.lower()
-
-    # If this is a NYT recipe, prepend the recipe ID for direct access
-    if original_url:
-        nyt_id = extract_nyt_recipe_id(original_url)
-        if nyt_id:
-            slug = f"{nyt_id}-{slug}"
-
-    return slug
-
 def recipe_to_markdown(recipe_json, original_url=None):
-    md = f"# {recipe_json.get('name', 'Recipe')}\n\n"
+    # Collect pieces and join once at the end rather than growing a string
+    parts = [f"# {recipe_json.get('name', 'Recipe')}\n\n"]
 
     # Handle author - can be either a dict (NYT) or a list (Bon Appétit)
     author = recipe_json.get('author')
@@ -490,64 +843,122 @@ def recipe_to_markdown(recipe_json, original_url=None):
 
     # Format author line with domain (matching recipe_card.html format)
     if author_name and domain:
-        md += f"*By {author_name} from {domain}*\n\n"
+        parts.append(f"*By {author_name} from {domain}*\n\n")
     elif author_name:
-        md += f"*By {author_name}*\n\n"
+        parts.append(f"*By {author_name}*\n\n")
     elif domain:
-        md += f"*From {domain}*\n\n"
-
-    if recipe_json.get('description'):
-        md += f"{recipe_json['description']}\n\n"
-
-    # Recipe meta information
-    meta_items = []
-    if recipe_json.get('totalTime'):
-        meta_items.append(f"**Total Time:** {format_duration(recipe_json['totalTime'])}")
-    if recipe_json.get('prepTime'):
-        meta_items.append(f"**Prep Time:** {format_duration(recipe_json['prepTime'])}")
-    if recipe_json.get('cookTime'):
-        meta_items.append(f"**Cook Time:** {format_duration(recipe_json['cookTime'])}")
-    if recipe_json.get('recipeYield'):
-        meta_items.append(f"**Serves:** {recipe_json['recipeYield']}")
+        parts.append(f"*From {domain}*\n\n")
+
+    description = recipe_json.get('description')
+    if description:
+        parts.append(f"{description}\n\n")
+
+    # Recipe meta information; each field is looked up once
+    meta_items = [
+        f"**{label}:** {format_duration(value)}"
+        for label, value in (
+            ('Total Time', recipe_json.get('totalTime')),
+            ('Prep Time', recipe_json.get('prepTime')),
+            ('Cook Time', recipe_json.get('cookTime')),
+        ) if value
+    ]
+    recipe_yield = recipe_json.get('recipeYield')
+    if recipe_yield:
+        meta_items.append(f"**Serves:** {recipe_yield}")
 
     if meta_items:
-        md += " | ".join(meta_items) + "\n\n"
+        parts.append(" | ".join(meta_items) + "\n\n")
 
     # Ingredients
-    md += "## Ingredients\n\n"
-    for ingredient in recipe_json.get('recipeIngredient', []):
-        md += f"- {ingredient}\n"
-    md += "\n"
+    parts.append("## Ingredients\n\n")
+    parts.extend(f"- {ingredient}\n" for ingredient in recipe_json.get('recipeIngredient', []))
+    parts.append("\n")
 
     # Instructions
-    md += "## Instructions\n\n"
+    parts.append("## Instructions\n\n")
     instructions = flatten_instructions(recipe_json.get('recipeInstructions', []))
-    for i, instruction in enumerate(instructions, 1):
-        md += f"{i}. {instruction}\n"
-    md += "\n"
+    parts.extend(f"{i}. {instruction}\n" for i, instruction in enumerate(instructions, 1))
+    parts.append("\n")
 
     # Tips
-    if recipe_json.get('tips'):
-        md += "## Tips\n\n"
-        for tip in recipe_json['tips']:
-            md += f"- {tip}\n"
-        md += "\n"
+    tips = recipe_json.get('tips')
+    if tips:
+        parts.append("## Tips\n\n")
+        parts.extend(f"- {tip}\n" for tip in tips)
+        parts.append("\n")
 
     # Notes
-    if recipe_json.get('notes'):
-        md += "## Notes\n\n"
-        md += f"{recipe_json['notes']}\n\n"
+    notes = recipe_json.get('notes')
+    if notes:
+        parts.append("## Notes\n\n")
+        parts.append(f"{notes}\n\n")
 
     # Rating
-    if recipe_json.get('aggregateRating') and recipe_json['aggregateRating'].get('ratingValue'):
-        rating = recipe_json['aggregateRating']['ratingValue']
-        review_count = recipe_json['aggregateRating'].get('reviewCount', '')
+    aggregate_rating = recipe_json.get('aggregateRating') or {}
+    rating = aggregate_rating.get('ratingValue')
+    if rating:
+        review_count = aggregate_rating.get('reviewCount', '')
         review_text = f" (based on {review_count} reviews)" if review_count else ""
-        md += f"**Rating:** {rating}/5 stars{review_text}\n"
-
-    return md
-
-recipe_cache = {}
+        parts.append(f"**Rating:** {rating}/5 stars{review_text}\n")
+
+    return ''.join(parts)
+
+# In-memory recipe cache, used when Redis is unavailable (or a Redis call
+# fails). Bounded so a long-running worker can't grow without limit; the least
+# recently used recipes are evicted first, and entries expire after the same
+# RECIPE_CACHE_TTL as in Redis. cachetools caches aren't thread-safe, so every
+# access goes through recipe_cache_lock.
+RECIPE_CACHE_SIZE = int(os.getenv('RECIPE_CACHE_SIZE', '1024'))
+recipe_cache = TTLCache(maxsize=RECIPE_CACHE_SIZE, ttl=RECIPE_CACHE_TTL)
+recipe_cache_lock = threading.Lock()
+
+# Recipes recently read from or written to Redis, already decoded, so a hot
+# slug skips the Redis round trip and the JSON decode. Shares recipe_cache_lock.
+# Nothing tells other Gunicorn workers about a refresh, so they can keep
+# serving the old recipe from here for up to LOCAL_RECIPE_TTL. A card rendered
+# from that copy just before it expires is kept for RENDERED_CARD_TTL more, so
+# a refresh reaches every worker within LOCAL_RECIPE_TTL + RENDERED_CARD_TTL
+# (10 minutes). The worker handling the refresh drops both copies at once.
+LOCAL_RECIPE_CACHE_SIZE = 512
+LOCAL_RECIPE_TTL = 300
+local_recipe_cache = TTLCache(maxsize=LOCAL_RECIPE_CACHE_SIZE, ttl=LOCAL_RECIPE_TTL)
+
+# Rendered recipe cards, keyed by the full request URL because the template
+# embeds request.url and request.path. Each entry remembers the recipe slug it
+# was rendered from, so caching or deleting that recipe in this worker drops
+# it. Entries expire after a few minutes so a ?refresh=1 handled by another
+# Gunicorn worker still shows up here, within the bound described above for
+# local_recipe_cache.
+RENDERED_CARD_CACHE_SIZE = 256
+RENDERED_CARD_TTL = 300
+rendered_card_cache = OrderedDict()
+rendered_card_lock = threading.Lock()
+
+def get_rendered_card(url):
+    """Return previously rendered recipe card HTML for url, or None"""
+    with rendered_card_lock:
+        entry = rendered_card_cache.get(url)
+        if not entry:
+            return None
+        if time.monotonic() - entry['rendered_at'] > RENDERED_CARD_TTL:
+            del rendered_card_cache[url]
+            return None
+        rendered_card_cache.move_to_end(url)
+        return entry['html']
+
+def store_rendered_card(url, slug, html):
+    """Keep recipe card HTML rendered for url from slug, evicting the least recently used"""
+    with rendered_card_lock:
+        rendered_card_cache[url] = {'html': html, 'slug': slug, 'rendered_at': time.monotonic()}
+        rendered_card_cache.move_to_end(url)
+        while len(rendered_card_cache) > RENDERED_CARD_CACHE_SIZE:
+            rendered_card_cache.popitem(last=False)
+
+def forget_rendered_cards(*slugs):
+    """Drop every rendered card for the given recipe slugs, whatever the query string"""
+    with rendered_card_lock:
+        for url in [u for u, entry in rendered_card_cache.items() if entry['slug'] in slugs]:
+            del rendered_card_cache[url]
 
 
 @app.route('/health')
@@ -555,7 +966,7 @@ def health():
     """Health check endpoint for k8s"""
     try:
         # Simple health check - verify we can import required modules
-        import json, requests, bs4
+        import json, requests, lxml
         import datetime
 
         health_status = {
@@ -570,20 +981,47 @@ def health():
                 redis_client.ping()
                 health_status["redis"] = "connected"
             except Exception as redis_error:
-                logger.warning(f"Redis health check failed: {redis_error}")
+                logger.warning("Redis health check failed: %s", redis_error)
                 health_status["redis"] = "disconnected"
                 health_status["redis_error"] = str(redis_error)
                 # Still return 200 since app falls back to in-memory cache
 
         return health_status, 200
     except Exception as e:
-        logger.error(f"Health check failed: {e}")
+        logger.error("Health check failed: %s", e)
         return {"status": "unhealthy", "error": str(e)}, 500
 
 
+# Recipe pages only change on ?refresh=1, but a refresh has to reach browsers
+# and proxies too, so they may store pages yet must revalidate every use. An
+# unchanged page then costs a 304 against the ETag rather than a full body.
+# The refresh response itself is never stored, so a repeat refresh always
+# reaches the app.
+RECIPE_CACHE_CONTROL = 'public, no-cache'
+REFRESH_CACHE_CONTROL = 'no-store'
+
+def cacheable_response(body, content_type=None):
+    """Wrap a recipe page with caching headers, answering 304 when the ETag matches"""
+    response = make_response(body)
+    if content_type:
+        response.content_type = content_type
+    if request.args.get('refresh') == '1':
+        response.headers['Cache-Control'] = REFRESH_CACHE_CONTROL
+        return response
+    response.headers['Cache-Control'] = RECIPE_CACHE_CONTROL
+    response.add_etag()
+    return response.make_conditional(request)
+
+# The landing page has no per-request content (only static asset URLs), so it
+# is rendered on first use and reused. Skipped when template reloading is on.
+index_html = None
+
 @app.route('/')
 def index():
-    return render_template('index.html')
+    global index_html
+    if index_html is None or app.config['TEMPLATES_AUTO_RELOAD']:
+        index_html = render_template('index.html')
+    return index_html
 
 @app.route('/process', methods=['POST'])
 def process_recipe():
@@ -592,16 +1030,16 @@ def process_recipe():
         return redirect('/')
 
     try:
-        logger.info(f"=== Processing recipe URL: {recipe_url} ===")
+        logger.info("=== Processing recipe URL: %s ===", recipe_url)
 
         # Normalize URL for clean path
         clean_path = normalize_url_for_path(recipe_url)
-        logger.info(f"Normalized path: {clean_path}")
+        logger.debug("Normalized path: %s", clean_path)
 
         # Check cache FIRST to avoid unnecessary fetching
         cached_data = get_cached_recipe(clean_path)
         if cached_data:
-            logger.info(f"Recipe already in cache, redirecting immediately")
+            logger.info("Recipe already in cache, redirecting immediately")
             return redirect(f"/{clean_path}")
 
         # Not in cache - fetch recipe
@@ -619,19 +1057,20 @@ def process_recipe():
                 ]
             ), 400
 
-        logger.info(f"Recipe data keys: {list(recipe_json.keys()) if recipe_json else 'None'}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Recipe data keys: %s", list(recipe_json.keys()) if recipe_json else 'None')
 
         # Cache using clean path as key
         cache_recipe(clean_path, recipe_json, recipe_url)
-        logger.info(f"Cached recipe at path: {clean_path}")
+        logger.debug("Cached recipe at path: %s", clean_path)
 
         # Redirect to new URL-based path
-        logger.info(f"Redirecting to /{clean_path}")
+        logger.debug("Redirecting to /%s", clean_path)
         return redirect(f"/{clean_path}")
     except Exception as e:
-        logger.error(f"ERROR in process_recipe: {str(e)}")
-        logger.error(f"ERROR type: {type(e)}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.error("ERROR in process_recipe: %s", e)
+        logger.error("ERROR type: %s", type(e))
+        logger.error("Traceback: %s", traceback.format_exc())
 
         # Determine error type and provide helpful message
         error_msg = str(e)
@@ -680,42 +1119,61 @@ def process_recipe():
                 ]
             ), 400
 
+# Upper bound on URLs per /prefetch call, so one request can't tie up the
+# fetch pool (and the origin sites) indefinitely
+MAX_PREFETCH_URLS = 20
+
+@app.route('/prefetch', methods=['GET', 'POST'])
+def prefetch():
+    """
+    Warm the cache for several recipe URLs at once (e.g. every link on an index
+    page), fetching them concurrently instead of one first-view miss at a time.
+    URLs are passed as repeated urls form fields. POST only, so crawlers, link
+    previews and browser prefetching can't set off a batch of outbound fetches;
+    GET is routed here just to refuse it rather than fall through to recipe_card.
+    """
+    if request.method != 'POST':
+        return {"error": "Use POST"}, 405, {'Allow': 'POST'}
+    urls = [u.strip() for u in request.form.getlist('urls') if u.strip()]
+    if not urls:
+        return {"error": "No urls given"}, 400
+    if len(urls) > MAX_PREFETCH_URLS:
+        return {"error": f"At most {MAX_PREFETCH_URLS} urls per request"}, 400
+
+    results = prefetch_recipes(urls)
+    return {"recipes": {url: (f"/{path}" if path else None) for url, path in results.items()}}, 200
+
 @app.route('/<int:recipe_id>')
 @app.route('/recipes/<int:recipe_id>')
 @app.route('/recipes/<int:recipe_id>-<recipe_name>')
 def nyt_recipe_auto_fetch(recipe_id, recipe_name=None):
     """Auto-fetch NYT recipes by ID if not cached"""
-    # Check for refresh parameter to force cache bust
-    if request.args.get('refresh') == '1':
-        logger.info(f"Cache refresh requested for recipe ID {recipe_id}")
-        # Clear all cached versions of this recipe (with any slug variation)
-        cache_keys = get_cache_keys()
-        for key in cache_keys:
-            if key.startswith(f"{recipe_id}-"):
-                delete_cached_recipe(key)
-                logger.info(f"Deleted cached recipe key: {key}")
-
-    # Try to find the recipe in cache first - check both formats
-    slug_with_id = f"{recipe_id}-{recipe_name}" if recipe_name else None
+    id_prefix = f"{recipe_id}-"
     cached_data = None
 
-    if slug_with_id:
-        cached_data = get_cached_recipe(slug_with_id)
+    # Check for refresh parameter to force cache bust
+    if request.args.get('refresh') == '1':
+        logger.info("Cache refresh requested for recipe ID %s", recipe_id)
+        expire_fetched_recipes(f"https://cooking.nytimes.com/recipes/{recipe_id}")
+        # Clear all cached versions of this recipe (with any slug variation) in
+        # one call; with nothing left cached there's no lookup to do below
+        delete_cached_recipe(*get_cache_keys(id_prefix))
+    else:
+        # Try to find the recipe in cache first - check both formats
+        slug_with_id = f"{id_prefix}{recipe_name}" if recipe_name else None
+        if slug_with_id:
+            cached_data = get_cached_recipe(slug_with_id)
 
-    if not cached_data:
-        # Try to find any cached recipe with this ID
-        cache_keys = get_cache_keys()
-        for key in cache_keys:
-            if key.startswith(f"{recipe_id}-"):
-                cached_data = get_cached_recipe(key)
-                if cached_data:
-                    logger.info(f"Found cached recipe with ID {recipe_id} under key: {key}")
-                    break
+        if not cached_data:
+            # Try to find any cached recipe with this ID
+            cached_data = find_cached_nyt_recipe(recipe_id)
+            if cached_data:
+                logger.info("Found cached recipe with ID %s", recipe_id)
 
     if not cached_data:
         # Auto-fetch from NYT
         nyt_url = f"https://cooking.nytimes.com/recipes/{recipe_id}"
-        logger.info(f"Auto-fetching NYT recipe {recipe_id} from: {nyt_url}")
+        logger.info("Auto-fetching NYT recipe %s from: %s", recipe_id, nyt_url)
 
         try:
             recipe_json = get_recipe_with_retry(nyt_url)
@@ -723,12 +1181,12 @@ def nyt_recipe_auto_fetch(recipe_id, recipe_name=None):
                 # Generate proper slug and cache
                 recipe_slug = get_recipe_slug(recipe_json, nyt_url)
                 cache_recipe(recipe_slug, recipe_json, nyt_url)
-                logger.info(f"Auto-fetched and cached recipe as: {recipe_slug}")
+                logger.info("Auto-fetched and cached recipe as: %s", recipe_slug)
 
                 # Redirect to the proper slug URL
                 return redirect(f"/{recipe_slug}")
             else:
-                logger.error(f"Failed to fetch recipe {recipe_id}")
+                logger.error("Failed to fetch recipe %s", recipe_id)
                 return render_template('error.html',
                     error_title="Recipe Not Found",
                     error_description=f"Could not find recipe {recipe_id} at NYT Cooking.",
@@ -739,7 +1197,7 @@ def nyt_recipe_auto_fetch(recipe_id, recipe_name=None):
                     ]
                 ), 404
         except Exception as e:
-            logger.error(f"Error auto-fetching recipe {recipe_id}: {e}")
+            logger.error("Error auto-fetching recipe %s: %s", recipe_id, e)
             return render_template('error.html',
                 error_title="Error Fetching Recipe",
                 error_description="Failed to automatically fetch the recipe from NYT Cooking.",
@@ -757,12 +1215,12 @@ def nyt_recipe_auto_fetch(recipe_id, recipe_name=None):
         else:
             recipe_json = cached_data
 
-        logger.info(f"Rendering auto-fetched recipe {recipe_id}")
-        return render_template('recipe_card.html', recipe=recipe_json)
+        logger.debug("Rendering auto-fetched recipe %s", recipe_id)
+        return cacheable_response(render_template('recipe_card.html', recipe=recipe_json))
 
 @app.route('/<path:recipe_path>')
 def recipe_card(recipe_path):
-    logger.info(f"=== Recipe card requested for path: {recipe_path} ===")
+    logger.debug("=== Recipe card requested for path: %s ===", recipe_path)
 
     # Check if it's the markdown export endpoint
     if recipe_path.endswith('/markdown'):
@@ -772,8 +1230,15 @@ def recipe_card(recipe_path):
 
     # Check for refresh parameter to force cache bust
     if request.args.get('refresh') == '1':
-        logger.info(f"Cache refresh requested for '{recipe_path}'")
+        logger.info("Cache refresh requested for '%s'", recipe_path)
         delete_cached_recipe(recipe_path)
+        expire_fetched_recipes(denormalize_path_to_url(recipe_path),
+                               denormalize_path_to_url_with_www(recipe_path))
+    else:
+        rendered = get_rendered_card(request.url)
+        if rendered is not None:
+            logger.debug("Serving pre-rendered recipe card for '%s'", recipe_path)
+            return cacheable_response(rendered)
 
     # Try cache first using the clean path
     cached_data = get_cached_recipe(recipe_path)
@@ -782,14 +1247,14 @@ def recipe_card(recipe_path):
         # Found in cache
         recipe_json = cached_data['recipe']
         original_url = cached_data['original_url']
-        logger.info(f"Recipe found in cache with URL: {original_url}")
+        logger.debug("Recipe found in cache with URL: %s", original_url)
     elif cached_data:
         # Old format (just recipe data)
         recipe_json = cached_data
-        logger.info(f"Recipe found in cache (old format)")
+        logger.debug("Recipe found in cache (old format)")
     else:
         # Not in cache - try to fetch from URL in path
-        logger.warning(f"Recipe '{recipe_path}' not found in cache")
+        logger.warning("Recipe '%s' not found in cache", recipe_path)
 
         # Try to reconstruct URL from path
         urls_to_try = [
@@ -797,34 +1262,23 @@ def recipe_card(recipe_path):
             denormalize_path_to_url_with_www(recipe_path),  # Try https://www.
         ]
 
-        recipe_json = None
-        successful_url = None
-
-        for attempt, url in enumerate(urls_to_try, 1):
-            logger.info(f"Attempt {attempt}/{len(urls_to_try)}: Trying to fetch from {url}")
-            try:
-                recipe_json = get_recipe_with_retry(url, max_retries=2)
-                if recipe_json:
-                    logger.info(f"Successfully fetched from {url}")
-                    successful_url = url
-                    # Cache it using the clean path
-                    cache_recipe(recipe_path, recipe_json, url)
-                    break
-            except Exception as e:
-                logger.warning(f"Failed to fetch from {url}: {e}")
-                continue
+        logger.info("Trying to fetch from %s", urls_to_try)
+        recipe_json, successful_url = fetch_first_variant(urls_to_try)
 
         if not recipe_json:
-            logger.error(f"Failed to fetch recipe from any URL variant of {recipe_path}")
+            logger.error("Failed to fetch recipe from any URL variant of %s", recipe_path)
             return render_template('404.html', recipe_name=recipe_path), 404
 
-    logger.info(f"Recipe ready for rendering: {recipe_json.get('name', 'NO NAME')}")
+        # Cache it using the clean path
+        cache_recipe(recipe_path, recipe_json, successful_url)
+
+    logger.debug("Recipe ready for rendering: %s", recipe_json.get('name', 'NO NAME'))
 
     try:
-        return render_template('recipe_card.html', recipe=recipe_json)
+        rendered = render_template('recipe_card.html', recipe=recipe_json)
     except Exception as e:
-        logger.error(f"Template rendering failed: {e}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.error("Template rendering failed: %s", e)
+        logger.error("Traceback: %s", traceback.format_exc())
         return render_template('error.html',
             error_title="Template Rendering Error",
             error_description="Failed to render the recipe card. The recipe data might be malformed.",
@@ -836,54 +1290,56 @@ def recipe_card(recipe_path):
             ]
         ), 500
 
+    if request.args.get('refresh') != '1':
+        store_rendered_card(request.url, recipe_path, rendered)
+    return cacheable_response(rendered)
+
 def recipe_markdown(recipe_path):
     """Handle markdown export - called from recipe_card route"""
     cached_data = get_cached_recipe(recipe_path)
     original_url = None
+    markdown = None
 
     if cached_data and isinstance(cached_data, dict) and 'recipe' in cached_data:
-        # Found in cache
+        # Found in cache; entries written before markdown was precomputed lack it
         recipe_json = cached_data['recipe']
         original_url = cached_data.get('original_url')
+        markdown = cached_data.get('markdown')
     elif cached_data:
         # Old format
         recipe_json = cached_data
     else:
         # Not in cache - try to fetch
-        logger.warning(f"Recipe '{recipe_path}' not found in cache for markdown export")
+        logger.warning("Recipe '%s' not found in cache for markdown export", recipe_path)
 
         urls_to_try = [
             denormalize_path_to_url(recipe_path),
             denormalize_path_to_url_with_www(recipe_path),
         ]
 
-        recipe_json = None
-        for url in urls_to_try:
-            try:
-                logger.info(f"Markdown export: Trying to fetch from {url}")
-                recipe_json = get_recipe_with_retry(url, max_retries=2)
-                if recipe_json:
-                    cache_recipe(recipe_path, recipe_json, url)
-                    original_url = url
-                    break
-            except Exception as e:
-                logger.warning(f"Markdown export fetch failed: {e}")
-                continue
-
+        logger.info("Markdown export: Trying to fetch from %s", urls_to_try)
+        recipe_json, original_url = fetch_first_variant(urls_to_try)
         if not recipe_json:
             return "Recipe not found", 404
+        markdown = cache_recipe(recipe_path, recipe_json, original_url)['markdown']
 
-    return recipe_to_markdown(recipe_json, original_url), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+    if markdown is None:
+        markdown = recipe_to_markdown(recipe_json, original_url)
+    return cacheable_response(markdown, 'text/plain; charset=utf-8')
 
 if __name__ == '__main__':
     try:
         logger.info("Starting Flask development server...")
-        app.run(debug=True, host='0.0.0.0', port=5000)
+        # threaded=True (Werkzeug's default, spelled out) so a slow recipe fetch
+        # doesn't block other requests to the dev server. The reloader and
+        # interactive debugger are opt-in with FLASK_DEBUG=1; production runs
+        # under Gunicorn and never reaches this block.
+        app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000, threaded=True)
     except Exception as e:
-        logger.error(f"Failed to start Flask app: {e}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.error("Failed to start Flask app: %s", e)
+        logger.error("Traceback: %s", traceback.format_exc())
         sys.exit(1)
 else:
     # This runs when imported by Gunicorn
     logger.info("Flask app imported by WSGI server (Gunicorn)")
-    logger.info(f"App routes: {[rule.rule for rule in app.url_map.iter_rules()]}")
+    logger.info("App routes: %s", [rule.rule for rule in app.url_map.iter_rules()])
@@ -0,0 +1,239 @@
+"""
+Recipe helpers with no Flask dependency: URL normalization, duration and
+instruction formatting, slugs, and the Redis connection.
+"""
+import logging
+import os
+import re
+import time
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# URL normalization helpers
+@lru_cache(maxsize=4096)
+def normalize_url_for_path(url):
+    """Convert full URL to clean path format (remove protocol and www)"""
+    # One key per page, so the same recipe isn't cached under several spellings:
+    # host lowercased, trailing slash, query and fragment dropped. The query has
+    # to go because the result is also the /<path> the user is redirected to,
+    # and recipe_card looks recipes up by that path alone.
+    parts = urlsplit(url if '://' in url else f'//{url}')
+    return parts.netloc.lower().removeprefix('www.') + parts.path.rstrip('/')
+
+def denormalize_path_to_url(path):
+    """Convert clean path back to full URL (add https://)"""
+    # Try with https:// first
+    url = f"https://{path}"
+    return url
+
+def denormalize_path_to_url_with_www(path):
+    """Convert clean path to full URL with www. prefix"""
+    # Some sites require www.
+    if not path.startswith('www.'):
+        return f"https://www.{path}"
+    return f"https://{path}"
+
+# ISO 8601 time-only durations (PT#H#M#S). Not anchored at the end: some sites
+# publish fractional seconds ("PT45M0.5S") and the leading components still read fine.
+ISO8601_DURATION_RE = re.compile(r'PT(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?')
+
+# Helper function to format ISO 8601 durations
+def format_duration(duration_str):
+    """Convert ISO 8601 duration (e.g., 'PT0H45M') to readable format (e.g., '45 minutes')"""
+    if not duration_str or not isinstance(duration_str, str):
+        return duration_str
+
+    # If it's already readable (doesn't start with PT), return as is
+    if not duration_str.startswith('PT'):
+        return duration_str
+
+    match = ISO8601_DURATION_RE.match(duration_str)
+
+    if not match:
+        return duration_str
+
+    values = match.groupdict(0)
+    hours = int(values['hours'])
+    minutes = int(values['minutes'])
+    seconds = int(values['seconds'])
+
+    parts = []
+    if hours > 0:
+        parts.append(f"{hours} {'hour' if hours == 1 else 'hours'}")
+    if minutes > 0:
+        parts.append(f"{minutes} {'minute' if minutes == 1 else 'minutes'}")
+    if seconds > 0 and hours == 0:  # Only show seconds if no hours
+        parts.append(f"{seconds} {'second' if seconds == 1 else 'seconds'}")
+
+    return ' '.join(parts) if parts else duration_str
+
+# Helper function to flatten recipe instructions
+def flatten_instructions(instructions):
+    """Flatten recipe instructions that may contain HowToSection objects"""
+    if not instructions:
+        return []
+
+    # Runs on every card render, so this tracing only costs anything at DEBUG
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Flattening instructions, type: %s, length: %s", type(instructions),
+                     len(instructions) if hasattr(instructions, '__len__') else 'N/A')
+        if isinstance(instructions, list):
+            logger.debug("First item type: %s", type(instructions[0]))
+            if len(instructions) > 1:
+                logger.debug("Second item: %s", instructions[1])
+
+    # Single-pass walk with an explicit stack: sections push their steps (a list
+    # or a single dict), and lists are pushed reversed so steps pop in order.
+    # A bare string or dict at the top level is treated as one instruction.
+    flattened = []
+    stack = [instructions]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            # Plain string instruction
+            flattened.append(item)
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+        elif isinstance(item, dict):
+            # HowToSection: walk its itemListElement (list of steps or single dict)
+            if item.get('@type') == 'HowToSection':
+                if 'itemListElement' in item:
+                    stack.append(item['itemListElement'])
+            # Check for text field (works for HowToStep and other formats)
+            elif 'text' in item:
+                flattened.append(item['text'])
+            # Check for name field as fallback
+            elif 'name' in item:
+                flattened.append(item['name'])
+            # Only add the stringified version if we really can't find text
+            # This prevents showing raw JSON metadata
+            elif len(item) == 1:
+                # Single-value dict, use the value
+                flattened.append(str(next(iter(item.values()))))
+            else:
+                logger.warning("Instruction item is dict but has no text/name: %s", item)
+        else:
+            logger.warning("Instruction item is unexpected type %s: %s", type(item), item)
+
+    return flattened
+
+# Helper function to extract domain from path. Memoized: the recipe card
+# template calls it with request.path on every render.
+@lru_cache(maxsize=4096)
+def extract_domain(path_or_url):
+    """Extract the domain from a URL or path"""
+    if not path_or_url:
+        return None
+
+    # Remove leading slash if present; bare paths get a '//' so urlsplit
+    # reads their first segment as the host
+    clean = path_or_url.lstrip('/')
+    if '://' not in clean:
+        clean = f"//{clean}"
+
+    domain = urlsplit(clean).netloc
+
+    return domain if domain else None
+
+# Anchored to the start of the path, with a bounded ID followed by a slug,
+# slash or end of path, so odd URLs can't yield a truncated ID
+NYT_RECIPE_PATH_RE = re.compile(r'/recipes/(\d{1,10})(?:[-/]|$)')
+MAX_URL_LENGTH = 2048
+
+@lru_cache(maxsize=4096)
+def extract_nyt_recipe_id(url):
+    """Extract recipe ID from NYT Cooking URLs"""
+    # Pattern: https://cooking.nytimes.com/recipes/1234567890-recipe-name
+    if not url or len(url) > MAX_URL_LENGTH:
+        return None
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    # hostname drops any port and is lowercased; match the host exactly or as
+    # a subdomain, never as a bare suffix like xcooking.nytimes.com
+    host = parts.hostname or ''
+    if host != 'cooking.nytimes.com' and not host.endswith('.cooking.nytimes.com'):
+        return None
+    match = NYT_RECIPE_PATH_RE.match(parts.path)
+    return match.group(1) if match else None
+
+# ASCII characters dropped from slugs (everything but letters, digits and '-')
+SLUG_DELETE_TABLE = str.maketrans('', '', ''.join(
+    c for c in map(chr, range(128)) if not (c.isalnum() or c == '-')
+))
+
+def get_recipe_slug(recipe_json, original_url=None):
+    """Generate slug from recipe name, optionally including NYT recipe ID"""
+    return slug_from_name(recipe_json.get('name', 'recipe'), original_url)
+
+@lru_cache(maxsize=4096)
+def slug_from_name(name, original_url=None):
+    """Build the slug for a recipe name; memoized since recipe dicts aren't hashable"""
+    # split() collapses whitespace runs; each word is filtered in one C-level
+    # translate pass instead of two regex substitutions over the whole name
+    words = (
+        word.encode('ascii', 'ignore').decode('ascii').translate(SLUG_DELETE_TABLE)
+        for word in name.split()
+    )
+    slug = '-'.join(word for word in words if word).lower()
+
+    # If this is a NYT recipe, prepend the recipe ID for direct access
+    if original_url:
+        nyt_id = extract_nyt_recipe_id(original_url)
+        if nyt_id:
+            slug = f"{nyt_id}-{slug}"
+
+    return slug
+
+# Redis connection with exponential backoff
+# Characters Redis MATCH patterns treat as glob syntax
+REDIS_GLOB_SPECIAL_RE = re.compile(r'([\\*?\[\]])')
+
+def redis_glob_escape(text):
+    """Escape text so a Redis MATCH pattern matches it literally"""
+    return REDIS_GLOB_SPECIAL_RE.sub(r'\\\1', text)
+
+def connect_to_redis_with_retry(max_retries=5, initial_delay=1, *, sleeper=None):
+    """
+    Attempt to connect to Redis with exponential backoff.
+    sleeper is called with each backoff delay (defaults to time.sleep).
+    Returns tuple: (redis_client, success_bool)
+    """
+    sleeper = sleeper or time.sleep
+    try:
+        import redis
+    except ImportError:
+        logger.warning("Redis module not available")
+        return None, False
+
+    redis_host = os.getenv('REDIS_HOST', 'localhost')
+    redis_port = int(os.getenv('REDIS_PORT', '6379'))
+
+    for attempt in range(1, max_retries + 1):
+        try:
+            logger.info("Attempting to connect to Redis at %s:%s (attempt %s/%s)", redis_host, redis_port, attempt, max_retries)
+            client = redis.Redis(
+                host=redis_host,
+                port=redis_port,
+                db=0,
+                # Replies stay bytes: cached recipes go straight to orjson,
+                # which parses bytes without a UTF-8 decode to str first
+                decode_responses=False,
+                socket_connect_timeout=5
+            )
+            # Test connection
+            client.ping()
+            logger.info("Redis connected successfully at %s:%s", redis_host, redis_port)
+            return client, True
+        except Exception as e:
+            if attempt < max_retries:
+                delay = initial_delay * (2 ** (attempt - 1))  # Exponential backoff
+                logger.warning("Redis connection attempt %s failed: %s. Retrying in %ss...", attempt, e, delay)
+                sleeper(delay)
+            else:
+                logger.warning("Redis connection failed after %s attempts: %s", max_retries, e)
+                logger.info("Falling back to in-memory cache")
+                return None, False